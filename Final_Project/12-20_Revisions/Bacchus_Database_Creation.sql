@@ -10,6 +10,7 @@ USE BacchusWineryDB;
 DROP USER IF EXISTS 'dionysus'@'localhost';
 CREATE USER 'dionysus'@'localhost' IDENTIFIED BY 'MountOlympus';
 GRANT ALL PRIVILEGES ON BacchusWineryDB.* TO 'dionysus'@'localhost';
+GRANT ALL PRIVILEGES ON BacchusWineryBench.* TO 'dionysus'@'localhost'; -- scratch database rebuilt by benchmark.py
 FLUSH PRIVILEGES;
 
 -- *** Create Tables
@@ -40,6 +41,26 @@ CREATE TABLE Hours (
     StartShift DATETIME NOT NULL,
     EndShift DATETIME NOT NULL,
     HoursWorked DECIMAL(4, 2),
+    FOREIGN KEY (EmployeeID) REFERENCES Employee (EmployeeID),
+    -- Covering index for the hours report: per-employee date ranges are read without touching the table rows.
+    INDEX idx_hours_emp_shift (EmployeeID, StartShift, HoursWorked)
+);
+
+-- Daily Hours Rollup Table (one row per employee per work date, rebuilt from Hours by rollups.py / the generator)
+CREATE TABLE HoursDaily (
+    EmployeeID INT NOT NULL,
+    WorkDate DATE NOT NULL,
+    TotalHours DECIMAL(6, 2) NOT NULL,
+    ShiftCount INT NOT NULL,
+    PRIMARY KEY (EmployeeID, WorkDate),
+    FOREIGN KEY (EmployeeID) REFERENCES Employee (EmployeeID)
+);
+
+-- Last date the hours generator has produced punches through for each employee (absent days included),
+-- so --incremental resumes after it instead of regenerating days that simply had no punch.
+CREATE TABLE HoursGenerated (
+    EmployeeID INT PRIMARY KEY,
+    GeneratedThrough DATE NOT NULL,
     FOREIGN KEY (EmployeeID) REFERENCES Employee (EmployeeID)
 );
 
@@ -91,7 +112,9 @@ CREATE TABLE SupplierDelivery (
     SupplierID INT NOT NULL,
     ExpectedDelivery DATE,
     ActualDelivery DATE,
-    FOREIGN KEY (SupplierID) REFERENCES Supplier(SupplierID)
+    FOREIGN KEY (SupplierID) REFERENCES Supplier(SupplierID),
+    -- One supplier's deliveries in date order, for the paged delivery detail view.
+    INDEX idx_delivery_supplier_expected (SupplierID, ExpectedDelivery)
 );
 
 -- Supplier Item Delivery Table
@@ -140,7 +163,9 @@ CREATE TABLE DistOrder (
     ShipmentID INT,
     OrderDate DATE,
     FOREIGN KEY (ShipmentID) REFERENCES Shipment (ShipmentID),
-    FOREIGN KEY (DistID) REFERENCES Distributor (DistID)
+    FOREIGN KEY (DistID) REFERENCES Distributor (DistID),
+    -- A distributor's orders for the wine distribution report (also serves the DistID foreign key).
+    INDEX idx_distorder_dist_order (DistID, OrderID)
 );
 
 -- Item Order ID Table
@@ -150,9 +175,122 @@ CREATE TABLE DistItemOrder (
     WineID INT NOT NULL,
     Quantity INT,
     FOREIGN KEY (OrderID) REFERENCES DistOrder (OrderID),
-    FOREIGN KEY (WineID) REFERENCES Wine (WineID)
+    FOREIGN KEY (WineID) REFERENCES Wine (WineID),
+    -- Covering index for the wine distribution report: an order's wines and quantities without the table rows.
+    INDEX idx_dio_order_wine (OrderID, WineID, Quantity)
 );
 
+-- ==================
+-- ** Summary Tables
+
+-- Wine Sales Summary Table (one row per wine, kept current from DistItemOrder by rollups.py / generateOrders.py)
+CREATE TABLE WineSalesSummary (
+    WineID INT PRIMARY KEY,
+    TotalSold INT NOT NULL DEFAULT 0,
+    LastOrderDate DATE,
+    FOREIGN KEY (WineID) REFERENCES Wine (WineID),
+    -- Sold and unsold wines are both read by TotalSold.
+    INDEX idx_wine_sales_total (TotalSold)
+);
+
+-- Summary Watermark Table (highest source row already counted into each incremental summary)
+CREATE TABLE SummaryWatermark (
+    Name VARCHAR(50) PRIMARY KEY,
+    LastID INT NOT NULL
+);
+
+-- Supplier Delivery Stats Tables (running counts and sums per supplier, and per supplier per expected month,
+-- kept current by the SupplierDelivery triggers below; rollups.py can rebuild them)
+-- Average days late = SumDaysDifference / MeasuredDeliveries (deliveries with both dates filled in).
+CREATE TABLE SupplierDeliveryStats (
+    SupplierID INT PRIMARY KEY,
+    TotalDeliveries INT NOT NULL DEFAULT 0,
+    PendingDeliveries INT NOT NULL DEFAULT 0,
+    MeasuredDeliveries INT NOT NULL DEFAULT 0,
+    SumDaysDifference INT NOT NULL DEFAULT 0,
+    EarlyCount INT NOT NULL DEFAULT 0,
+    OnTimeCount INT NOT NULL DEFAULT 0,
+    LateCount INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (SupplierID) REFERENCES Supplier (SupplierID)
+);
+
+CREATE TABLE SupplierDeliveryMonthStats (
+    SupplierID INT NOT NULL,
+    MonthStart DATE NOT NULL,
+    TotalDeliveries INT NOT NULL DEFAULT 0,
+    PendingDeliveries INT NOT NULL DEFAULT 0,
+    MeasuredDeliveries INT NOT NULL DEFAULT 0,
+    SumDaysDifference INT NOT NULL DEFAULT 0,
+    EarlyCount INT NOT NULL DEFAULT 0,
+    OnTimeCount INT NOT NULL DEFAULT 0,
+    LateCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (SupplierID, MonthStart),
+    FOREIGN KEY (SupplierID) REFERENCES Supplier (SupplierID)
+);
+
+-- *** Summary Maintenance
+
+-- Adds (delta = 1) or removes (delta = -1) one delivery's contribution to the supplier delivery stats.
+-- The row alias (AS new, MySQL 8.0.19+) replaces VALUES(), which is deprecated and warns on every delivery write.
+DELIMITER //
+CREATE PROCEDURE ApplyDeliveryStats(IN supplier INT, IN expected DATE, IN actual DATE, IN delta INT)
+BEGIN
+    DECLARE pending INT DEFAULT IF(actual IS NULL, 1, 0);
+    DECLARE measured INT DEFAULT IF(actual IS NULL OR expected IS NULL, 0, 1);
+    DECLARE diff INT DEFAULT COALESCE(DATEDIFF(actual, expected), 0);
+
+    INSERT INTO SupplierDeliveryStats
+        (SupplierID, TotalDeliveries, PendingDeliveries, MeasuredDeliveries, SumDaysDifference, EarlyCount, OnTimeCount, LateCount)
+    VALUES
+        (supplier, delta, delta * pending, delta * measured, delta * diff,
+         delta * measured * (diff < 0), delta * measured * (diff = 0), delta * measured * (diff > 0)) AS new
+    ON DUPLICATE KEY UPDATE
+        TotalDeliveries = TotalDeliveries + new.TotalDeliveries,
+        PendingDeliveries = PendingDeliveries + new.PendingDeliveries,
+        MeasuredDeliveries = MeasuredDeliveries + new.MeasuredDeliveries,
+        SumDaysDifference = SumDaysDifference + new.SumDaysDifference,
+        EarlyCount = EarlyCount + new.EarlyCount,
+        OnTimeCount = OnTimeCount + new.OnTimeCount,
+        LateCount = LateCount + new.LateCount;
+
+    IF expected IS NOT NULL THEN
+        INSERT INTO SupplierDeliveryMonthStats
+            (SupplierID, MonthStart, TotalDeliveries, PendingDeliveries, MeasuredDeliveries, SumDaysDifference, EarlyCount, OnTimeCount, LateCount)
+        VALUES
+            (supplier, DATE_FORMAT(expected, '%Y-%m-01'), delta, delta * pending, delta * measured, delta * diff,
+             delta * measured * (diff < 0), delta * measured * (diff = 0), delta * measured * (diff > 0)) AS new
+        ON DUPLICATE KEY UPDATE
+            TotalDeliveries = TotalDeliveries + new.TotalDeliveries,
+            PendingDeliveries = PendingDeliveries + new.PendingDeliveries,
+            MeasuredDeliveries = MeasuredDeliveries + new.MeasuredDeliveries,
+            SumDaysDifference = SumDaysDifference + new.SumDaysDifference,
+            EarlyCount = EarlyCount + new.EarlyCount,
+            OnTimeCount = OnTimeCount + new.OnTimeCount,
+            LateCount = LateCount + new.LateCount;
+    END IF;
+END //
+
+-- A new delivery is counted; an update (e.g. ActualDelivery filled in) swaps the old row's contribution for the new one.
+CREATE TRIGGER trg_delivery_stats_insert AFTER INSERT ON SupplierDelivery
+FOR EACH ROW
+BEGIN
+    CALL ApplyDeliveryStats(NEW.SupplierID, NEW.ExpectedDelivery, NEW.ActualDelivery, 1);
+END //
+
+CREATE TRIGGER trg_delivery_stats_update AFTER UPDATE ON SupplierDelivery
+FOR EACH ROW
+BEGIN
+    CALL ApplyDeliveryStats(OLD.SupplierID, OLD.ExpectedDelivery, OLD.ActualDelivery, -1);
+    CALL ApplyDeliveryStats(NEW.SupplierID, NEW.ExpectedDelivery, NEW.ActualDelivery, 1);
+END //
+
+CREATE TRIGGER trg_delivery_stats_delete AFTER DELETE ON SupplierDelivery
+FOR EACH ROW
+BEGIN
+    CALL ApplyDeliveryStats(OLD.SupplierID, OLD.ExpectedDelivery, OLD.ActualDelivery, -1);
+END //
+DELIMITER ;
+
 -- =========================================================================
 -- Adds data to the Bacchus Database
 
@@ -366,3 +504,19 @@ VALUES
     (5, 1, 60), (5, 2, 60), (5, 3, 60), (5, 4, 60),
     -- Order 6 (Vulcan Trade Ltd)
     (6, 5, 45), (6, 6, 45), (6, 9, 45), (6, 10, 45);
+
+-- Build the wine sales summary from the orders above.
+INSERT INTO WineSalesSummary (WineID, TotalSold, LastOrderDate)
+SELECT
+    w.WineID,
+    COALESCE(SUM(dio.Quantity), 0),
+    MAX(o.OrderDate)
+FROM Wine AS w
+LEFT JOIN DistItemOrder AS dio
+    ON dio.WineID = w.WineID
+LEFT JOIN DistOrder AS o
+    ON o.OrderID = dio.OrderID
+GROUP BY w.WineID;
+
+INSERT INTO SummaryWatermark (Name, LastID)
+SELECT 'WineSalesSummary', COALESCE(MAX(OrderItemID), 0) FROM DistItemOrder;
@@ -1,40 +1,52 @@
+import argparse
+import array
+import multiprocessing
+import os
 import random
+import tempfile
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime, timedelta, time
-import mysql.connector
-from mysql.connector import Error
-from dotenv import dotenv_values
+from itertools import islice
+from mysql.connector import HAVE_CEXT, Error
 
+from bacchusDB import get_connection
+from loadHelpers import LOCAL_INFILE_DISABLED, chunkRows, deriveSeed, generateDateRange
+from rollups import refreshHoursDaily
+from tableFormat import printTable
 
-def getConn():
-    secrets = dotenv_values("setup.env")
+try:
+    import numpy as np
+except ImportError: # NumPy is only needed for the "numpy" engine.
+    np = None
 
-    config = {
-        "user": secrets["DB_USER"],
-        "password": secrets["DB_PASSWORD"],
-        "host": secrets["DB_HOST"],
-        "database": secrets["DB_NAME"],
-        "raise_on_warnings": True
-    }
 
-    try:
-        conn = mysql.connector.connect(**config)
-        if not conn.is_connected():
-            print("Could not connect to database.")
-            return None
-        return conn
+HOURS_COLUMNS = "(EmployeeID, StartShift, EndShift, HoursWorked)"
 
-    except Error as e:
-        print("Error:", e)
-        return None
+# Last day of the fiscal year the hours report reads; --end for a full regeneration.
+DEFAULT_END = date(2025, 11, 30)
+
+# --driver choices, as bacchusDB usePure values.
+DRIVERS = {"default": None, "c": False, "pure": True}
 
+# Ingestion paths compared by --benchmark: (label, usePure, loader)
+BENCHMARK_PATHS = [
+    ("pure-Python executemany", True, "executemany"),
+    ("pure-Python prepared", True, "prepared"),
+    ("pure-Python multi-row VALUES", True, "multirow"),
+    ("C extension executemany", False, "executemany"),
+    ("C extension prepared", False, "prepared"),
+    ("C extension multi-row VALUES", False, "multirow"),
+]
 
-def generateDateRange(startDate, endDate):
-    dates = []
-    current = startDate
-    while current <= endDate:
-        dates.append(current)
-        current += timedelta(days=1)
-    return dates
+# ShiftStore keeps start times as whole seconds from this (naive, like the Hours columns) epoch.
+SHIFT_EPOCH = datetime(1970, 1, 1)
+
+INSERT_SQL = f"""
+    INSERT INTO Hours
+    {HOURS_COLUMNS}
+    VALUES (%s, %s, %s, %s)
+"""
 
 
 def generateWeekdayHours():
@@ -74,68 +86,514 @@ def generateShiftTimes(workDate, hours):
     return startDT, endDT
 
 
-def buildHoursEntries(employeeIDs, startDate, endDate):
-    allRows = []
-    allDates = generateDateRange(startDate, endDate)
+def generateEmployeeShifts(empID, startDate, endDate):
+    # Yields (empID, StartShift, EndShift, HoursWorked) for each day the employee worked.
+    for d in generateDateRange(startDate, endDate):
+        weekday = d.weekday()
+
+        if weekday < 5:
+            hours = generateWeekdayHours()
+        elif weekday == 5:
+            hours = generateSaturdayHours()
+        else:
+            hours = None
+
+        if hours is None:
+            continue
+
+        startShift, endShift = generateShiftTimes(d, hours)
 
+        yield (empID, startShift, endShift, hours)
+
+
+def generateHoursEntries(employeeIDs, startDate, endDate):
+    # Yields every shift lazily; only one shift is held in memory at a time.
     for empID in employeeIDs:
-        for d in allDates:
-            weekday = d.weekday()
+        yield from generateEmployeeShifts(empID, startDate, endDate)
+
+
+class ShiftStore:
+    # Generated shifts kept as parallel array.array columns instead of a list of tuples:
+    #   empIDs       int32   EmployeeID
+    #   starts       int64   StartShift, seconds since SHIFT_EPOCH
+    #   centiHours   uint16  HoursWorked x 100 (the generators round hours to 2 places, so this is exact)
+    # That is 14 bytes a shift against ~300 for a tuple of an int, two datetimes and a float.
+    # Iterating yields the same (empID, StartShift, EndShift, HoursWorked) tuples the loaders take,
+    # one at a time, so only the shift being inserted is ever a Python object.
+
+    __slots__ = ("empIDs", "starts", "centiHours")
+
+    def __init__(self):
+        self.empIDs = array.array("i")
+        self.starts = array.array("q")
+        self.centiHours = array.array("H")
+
+    @classmethod
+    def fromRows(cls, rows):
+        store = cls()
+        store.extend(rows)
+        return store
+
+    @classmethod
+    def fromColumns(cls, columns):
+        # From the NumPy columns buildHoursColumns returns, without going through tuples.
+        empColumn, startShift, endShift, hoursWorked = columns
+        store = cls()
+        store.empIDs.frombytes(empColumn.astype("int32").tobytes())
+        store.starts.frombytes(startShift.astype("datetime64[s]").astype("int64").tobytes())
+        store.centiHours.frombytes(np.round(hoursWorked * 100).astype("uint16").tobytes())
+        return store
+
+    def append(self, empID, startShift, hours):
+        self.empIDs.append(empID)
+        self.starts.append((startShift - SHIFT_EPOCH) // timedelta(seconds=1))
+        self.centiHours.append(round(hours * 100))
+
+    def extend(self, rows):
+        for empID, startShift, endShift, hours in rows:
+            self.append(empID, startShift, hours)
+
+    def __len__(self):
+        return len(self.empIDs)
+
+    def __iter__(self):
+        for empID, start, centi in zip(self.empIDs, self.starts, self.centiHours):
+            startShift = SHIFT_EPOCH + timedelta(seconds=start)
+            yield empID, startShift, startShift + timedelta(seconds=centi * 36), centi / 100
+
+    def columns(self):
+        # (EmployeeID, StartShift, EndShift, HoursWorked) as NumPy arrays, for callers that want to total or
+        # filter shifts without building rows. Copies, so the store can still be appended to afterwards
+        # (an array.array can't grow while a NumPy view holds its buffer).
+        if np is None:
+            raise RuntimeError("ShiftStore.columns requires NumPy to be installed.")
+        startShift = np.array(self.starts, dtype="int64").astype("datetime64[s]")
+        centiHours = np.array(self.centiHours, dtype="uint16")
+        return (
+            np.array(self.empIDs, dtype="int32"),
+            startShift,
+            startShift + (centiHours.astype("int64") * 36).astype("timedelta64[s]"),
+            centiHours / 100
+        )
+
+
+def buildHoursColumns(employeeIDs, startDate, endDate, seed=None):
+    # Same distributions as generateHoursEntries, but every roll for every employee x date is drawn at once.
+    # Returns (EmployeeID, StartShift, EndShift, HoursWorked) as NumPy columns, with datetime64 shift times.
+    if np is None:
+        raise RuntimeError("The numpy engine requires NumPy to be installed.")
+
+    rng = np.random.default_rng(seed)
+
+    allDates = np.arange(
+        np.datetime64(startDate, "D"),
+        np.datetime64(endDate, "D") + 1
+    )
+    weekday = (allDates.astype("int64") + 3) % 7 # 1970-01-01 was a Thursday, so shift to Monday = 0.
+
+    shape = (len(employeeIDs), len(allDates))
+    hours = np.full(shape, np.nan)
+    roll = rng.random(shape)
+
+    isWeekday = np.broadcast_to(weekday < 5, shape)
+    isSaturday = np.broadcast_to(weekday == 5, shape)
+
+    short = isWeekday & (roll >= 0.05) & (roll < 0.15)  # Short day
+    normal = isWeekday & (roll >= 0.15)                  # Normal day
+    overtime = isSaturday & (roll < 0.20)                # Saturday overtime
+
+    hours[short] = np.round(rng.uniform(3, 6, short.sum()), 2)
+    hours[normal] = np.round(rng.uniform(7.5, 8.5, normal.sum()), 2)
+    hours[overtime] = np.round(rng.uniform(5, 8, overtime.sum()), 2)
+
+    empIDX, dateIDX = np.nonzero(~np.isnan(hours)) # Row-major, so rows come out in the same order as the loop.
+    hoursWorked = hours[empIDX, dateIDX]
+
+    offset = np.trunc(rng.triangular(-60, 0, 60, len(hoursWorked))).astype("int64") # int() truncates toward 0 as well.
+    startShift = (
+        allDates[dateIDX].astype("datetime64[m]")
+        + np.timedelta64(8 * 60, "m")
+        + offset.astype("timedelta64[m]")
+    ).astype("datetime64[us]")
+    endShift = startShift + np.round(hoursWorked * 3600 * 1e6).astype("timedelta64[us]")
+
+    empColumn = np.asarray(employeeIDs, dtype="int64")[empIDX]
+
+    return empColumn, startShift, endShift, hoursWorked
+
+
+def generateHoursColumnRows(employeeIDs, startDate, endDate, seed=None, employeesPerBlock=500):
+    # Runs the numpy engine over blocks of employees so only one block of columns is in memory at a time.
+    rng = np.random.default_rng(seed) if np is not None else None
+    for start in range(0, len(employeeIDs), employeesPerBlock):
+        block = employeeIDs[start:start + employeesPerBlock]
+        yield from ShiftStore.fromColumns(buildHoursColumns(block, startDate, endDate, rng)) # Rows built lazily.
+
+
+def formatTSVRow(row):
+    empID, startShift, endShift, hours = row
+    return f"{empID}\t{startShift:%Y-%m-%d %H:%M:%S}\t{endShift:%Y-%m-%d %H:%M:%S}\t{hours:.2f}\n"
+
+
+def parseTSVRow(line):
+    empID, startShift, endShift, hours = line.rstrip("\n").split("\t")
+    return int(empID), startShift, endShift, hours
+
+
+def insertMultiRow(cur, chunk):
+    # Sends the whole chunk as one INSERT ... VALUES (...), (...), ... statement.
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+    params = [value for row in chunk for value in row]
+    cur.execute(f"INSERT INTO Hours {HOURS_COLUMNS} VALUES {placeholders}", params)
+
+
+def insertChunk(cur, chunk, multiRow=False):
+    # executemany sends the rows as text through a normal cursor, or binary through a prepared one.
+    if multiRow:
+        insertMultiRow(cur, chunk)
+    else:
+        cur.executemany(INSERT_SQL, chunk)
+
+
+def insertHoursBatches(conn, cur, rows, chunkSize, commitEvery, multiRow=False):
+    # Pulls rows from the pipeline chunkSize at a time and commits every commitEvery rows,
+    # so memory is bounded by the chunk size no matter how long the date range is.
+    inserted = 0
+    sinceCommit = 0
+    for chunk in chunkRows(rows, chunkSize):
+        insertChunk(cur, chunk, multiRow)
 
-            if weekday < 5:
-                hours = generateWeekdayHours()
-            elif weekday == 5:
-                hours = generateSaturdayHours()
-            else:
-                hours = None
+        inserted += len(chunk)
+        sinceCommit += len(chunk)
+        if sinceCommit >= commitEvery:
+            conn.commit()
+            sinceCommit = 0
 
-            if hours is None:
-                continue
+    conn.commit()
+    return inserted
 
-            startShift, endShift = generateShiftTimes(d, hours)
 
-            allRows.append(
-                (empID, startShift, endShift, hours)
+def loadHoursInfile(conn, cur, rows, chunkSize, commitEvery):
+    # Streams the rows to a temporary TSV file one chunk at a time, then bulk loads it with LOAD DATA LOCAL INFILE.
+    # If local infile is disabled on the client or server, the same file is read back into chunked multi-row INSERTs.
+    handle = tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, newline="")
+    try:
+        with handle:
+            for chunk in chunkRows(rows, chunkSize):
+                handle.writelines(formatTSVRow(row) for row in chunk)
+
+        try:
+            cur.execute(
+                f"""
+                LOAD DATA LOCAL INFILE %s
+                INTO TABLE Hours
+                FIELDS TERMINATED BY '\\t'
+                LINES TERMINATED BY '\\n'
+                {HOURS_COLUMNS}
+                """,
+                (handle.name,)
             )
+            conn.commit()
+            return cur.rowcount
+
+        except Error as e:
+            if e.errno not in LOCAL_INFILE_DISABLED:
+                raise
+            print("LOAD DATA LOCAL INFILE is disabled, falling back to multi-row INSERTs.")
+
+        with open(handle.name, newline="") as tsv:
+            return insertHoursBatches(conn, cur, (parseTSVRow(line) for line in tsv), chunkSize, commitEvery, multiRow=True)
+
+    finally:
+        os.remove(handle.name)
+
+
+def generateRows(employeeIDs, startDate, endDate, seed, engine):
+    # Builds the lazy row pipeline for the chosen engine.
+    if engine == "numpy":
+        return generateHoursColumnRows(employeeIDs, startDate, endDate, seed)
+    random.seed(seed)
+    return generateHoursEntries(employeeIDs, startDate, endDate)
 
-    return allRows
+
+def fetchResumeDates(cur, employeeIDs, startDate):
+    # For each employee, the first date that still needs punches: the day after HoursGenerated says they
+    # were generated through, so days with no punch (absences, Sundays) aren't rolled again. Employees
+    # with punches from before HoursGenerated existed fall back to the day after their latest StartShift,
+    # and employees with neither start at startDate.
+    cur.execute("SELECT EmployeeID, GeneratedThrough FROM HoursGenerated;")
+    generated = dict(cur.fetchall())
+
+    cur.execute("SELECT EmployeeID, MAX(StartShift) FROM Hours GROUP BY EmployeeID;")
+    latest = {empID: lastShift.date() for empID, lastShift in cur.fetchall()}
+
+    resumeDates = {}
+    for empID in employeeIDs:
+        if empID in generated:
+            resumeDates[empID] = max(startDate, generated[empID] + timedelta(days=1))
+        elif empID in latest:
+            resumeDates[empID] = max(startDate, latest[empID] + timedelta(days=1))
+        else:
+            resumeDates[empID] = startDate
+    return resumeDates
+
+
+def markGenerated(conn, cur, employeeIDs, endDate):
+    # Records that every employee has been generated through endDate (never moving a date backwards).
+    # executemany folds the rows into one multi-row INSERT.
+    cur.executemany(
+        """
+        INSERT INTO HoursGenerated (EmployeeID, GeneratedThrough)
+        VALUES (%s, %s) AS new
+        ON DUPLICATE KEY UPDATE GeneratedThrough = GREATEST(GeneratedThrough, new.GeneratedThrough);
+        """,
+        [(empID, endDate) for empID in employeeIDs]
+    )
+    conn.commit()
+
+
+def generateIncrementalRows(resumeDates, endDate, seed, engine):
+    # Generates only the missing dates. Employees that resume on the same date are generated together.
+    groups = {}
+    for empID, firstDate in resumeDates.items():
+        if firstDate <= endDate:
+            groups.setdefault(firstDate, []).append(empID)
+
+    for firstDate in sorted(groups):
+        yield from generateRows(groups[firstDate], firstDate, endDate, deriveSeed(seed, firstDate), engine)
+
+
+def loadRows(conn, cur, rows, args):
+    # Sends the rows to the Hours table with the chosen loader. Returns the number of rows inserted.
+    if args.loader == "infile":
+        return loadHoursInfile(conn, cur, rows, args.chunk_size, args.commit_every)
+    if args.loader == "prepared":
+        preparedCur = conn.cursor(prepared=True) # Server-side statement, rows sent with the binary protocol.
+        try:
+            return insertHoursBatches(conn, preparedCur, rows, args.chunk_size, args.commit_every)
+        finally:
+            preparedCur.close()
+    return insertHoursBatches(
+        conn, cur, rows, args.chunk_size, args.commit_every,
+        multiRow=(args.loader == "multirow")
+    )
+
+
+def benchmarkLoaders(rows, chunkSize):
+    # Inserts the same rows through each BENCHMARK_PATHS entry and times it. Every path runs in a
+    # transaction that is rolled back afterwards, so Hours is left as it was.
+    results = []
+    for label, usePure, loader in BENCHMARK_PATHS:
+        if not usePure and not HAVE_CEXT:
+            results.append((label, len(rows), "", "C extension not installed"))
+            continue
+
+        with get_connection(usePure=usePure) as conn:
+            cur = conn.cursor(prepared=(loader == "prepared"))
+            try:
+                started = timer.perf_counter()
+                for chunk in chunkRows(rows, chunkSize):
+                    insertChunk(cur, chunk, multiRow=(loader == "multirow"))
+                elapsed = timer.perf_counter() - started
+            finally:
+                conn.rollback()
+                cur.close()
+
+        results.append((label, len(rows), f"{elapsed:.2f}s", f"{len(rows) / max(elapsed, 1e-9):,.0f}"))
+    return results
+
+
+def partitionEmployees(employeeIDs, workers):
+    # Splits the employees into contiguous, nearly equal partitions (one per worker).
+    size, extra = divmod(len(employeeIDs), workers)
+    partitions = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        partitions.append(employeeIDs[start:end])
+        start = end
+    return [p for p in partitions if p]
+
+
+def generatePartition(task):
+    # Runs in a worker process: generates one partition of employees and inserts it over its own connection.
+    partIndex, employeeIDs, startDate, endDate, resumeDates, args = task
+
+    seed = deriveSeed(args.seed, partIndex)
+    if resumeDates is None:
+        rows = generateRows(employeeIDs, startDate, endDate, seed, args.engine)
+    else:
+        rows = generateIncrementalRows(resumeDates, endDate, seed, args.engine)
+
+    with get_connection(allowLocalInfile=(args.loader == "infile"), usePure=DRIVERS[args.driver]) as conn:
+        cur = conn.cursor()
+        try:
+            return loadRows(conn, cur, rows, args)
+
+        except Error:
+            conn.rollback()
+            raise
+
+        finally:
+            cur.close()
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Generate random time punches for the Hours table.")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=date(2024, 12, 1),
+        help="first date to generate, YYYY-MM-DD (default: 2024-12-01)"
+    )
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=None,
+        help="last date to generate, YYYY-MM-DD (default: today with --incremental, otherwise 2025-11-30)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the existing punches and only generate the dates after each employee's generated-through "
+             "date in HoursGenerated, for a scheduled daily refresh"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="python loops one shift at a time; numpy draws every shift at once (default: python)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="random seed so the same punches can be generated again"
+    )
+    parser.add_argument(
+        "--loader",
+        choices=["executemany", "prepared", "multirow", "infile"],
+        default="executemany",
+        help="how rows are sent to MySQL; prepared uses a server-side statement and the binary protocol, "
+             "infile streams to a temp file and uses LOAD DATA LOCAL INFILE (default: executemany)"
+    )
+    parser.add_argument(
+        "--driver",
+        choices=list(DRIVERS),
+        default="default",
+        help="c forces the connector's C extension, pure the pure-Python protocol (default: connector's choice)"
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="instead of loading Hours, time each driver/loader combination on the same rows (rolled back)"
+    )
+    parser.add_argument(
+        "--benchmark-rows",
+        type=int,
+        default=20000,
+        help="rows to insert per path with --benchmark (default: 20000)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="rows generated and sent to MySQL per chunk (default: 5000)"
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=50000,
+        help="commit after this many rows are inserted (default: 50000)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="split the employees across this many processes, each with its own connection (default: 1)"
+    )
+    args = parser.parse_args()
+
+    if args.end is None:
+        args.end = date.today() if args.incremental else DEFAULT_END
+    return args
+
+
+def generateHours(conn, cur, employeeIDs, args):
+    startDate = args.start
+    endDate = args.end
+
+    if args.incremental:
+        resumeDates = fetchResumeDates(cur, employeeIDs, startDate)
+        changedFrom = min(resumeDates.values())
+    else:
+        resumeDates = None
+        changedFrom = startDate
+        cur.execute("TRUNCATE TABLE Hours;")
+        cur.execute("TRUNCATE TABLE HoursDaily;")
+        cur.execute("TRUNCATE TABLE HoursGenerated;")
+
+    started = timer.perf_counter()
+
+    if args.workers > 1:
+        partitions = partitionEmployees(employeeIDs, args.workers)
+        tasks = [
+            (i, part, startDate, endDate,
+             None if resumeDates is None else {empID: resumeDates[empID] for empID in part},
+             args)
+            for i, part in enumerate(partitions)
+        ]
+        # "spawn" so each worker builds its own connection pool instead of inheriting the parent's sockets.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(tasks), mp_context=context) as pool:
+            inserted = sum(pool.map(generatePartition, tasks))
+    elif resumeDates is None:
+        rows = generateRows(employeeIDs, startDate, endDate, args.seed, args.engine)
+        inserted = loadRows(conn, cur, rows, args)
+    else:
+        rows = generateIncrementalRows(resumeDates, endDate, args.seed, args.engine)
+        inserted = loadRows(conn, cur, rows, args)
+
+    markGenerated(conn, cur, employeeIDs, endDate)
+
+    elapsed = timer.perf_counter() - started
+    print("Hours generated successfully.")
+    print(f"{inserted:,} rows loaded in {elapsed:.2f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+    if changedFrom <= endDate:
+        written = refreshHoursDaily(conn, changedFrom, endDate)
+        print(f"HoursDaily refreshed for {changedFrom} to {endDate}: {written:,} rows.")
 
 
 def main():
+    args = parseArgs()
+
     employeeIDs = [
         6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
         16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26
     ]
 
-    startDate = date(2024, 12, 1)
-    endDate = date(2025, 11, 30)
-
-    rows = buildHoursEntries(employeeIDs, startDate, endDate)
-
-    insertSQL = """
-        INSERT INTO Hours
-        (EmployeeID, StartShift, EndShift, HoursWorked)
-        VALUES (%s, %s, %s, %s)
-    """
-
-    conn = getConn()
-    cur = conn.cursor()
-
     try:
-        cur.execute("TRUNCATE TABLE Hours;")
+        if args.benchmark:
+            rows = ShiftStore.fromRows(islice(generateRows(employeeIDs, args.start, args.end, args.seed, args.engine), args.benchmark_rows))
+            print(f"Timing {len(rows):,} rows through each ingestion path (changes are rolled back).")
+            printTable(["Path", "Rows", "Time", "Rows/sec"], benchmarkLoaders(rows, args.chunk_size))
+            return
+
+        with get_connection(allowLocalInfile=(args.loader == "infile"), usePure=DRIVERS[args.driver]) as conn:
+            cur = conn.cursor()
+            try:
+                generateHours(conn, cur, employeeIDs, args)
 
-        cur.executemany(insertSQL, rows)
-        conn.commit()
+            except Error:
+                conn.rollback()
+                raise
 
-        print("Hours generated successfully.")
+            finally:
+                cur.close()
 
     except Error as e:
         print("Error:", e)
-        conn.rollback()
-
-    finally:
-        cur.close()
-        conn.close()
 
 
 if __name__ == "__main__":
@@ -3,128 +3,153 @@
 
 # Objective - Generate report of average hours worked by each employee in the last quarter (using month since we made one month's worth of time punches)
 
-import mysql.connector
+import argparse
+
 from mysql.connector import Error
-from dotenv import dotenv_values
-from datetime import datetime, timedelta
-
-#using our .env file
-secrets = dotenv_values("setup.env")
-
-config = {
-    "user": secrets["DB_USER"],
-    "password": secrets["DB_PASSWORD"],
-    "host": secrets["DB_HOST"],
-    "database": secrets["DB_NAME"],
-    "raise_on_warnings": True #not in .env file
-}
-
-def fetchHoursWorked(conn):
-    cur = conn.cursor()
-
-    query = """
-        SELECT
-            e.EmployeeID,
-            d.Name,
-            e.FirstName,
-            e.LastName,
-
-            ROUND(SUM(CASE
-                WHEN h.StartShift BETWEEN '2024-12-01' AND '2025-02-28'
-                THEN h.HoursWorked END) / 13, 2) AS Q1_Avg,
-
-            ROUND(SUM(CASE
-                WHEN h.StartShift BETWEEN '2025-03-01' AND '2025-05-31'
-                THEN h.HoursWorked END) / 13, 2) AS Q2_Avg,
-
-            ROUND(SUM(CASE
-                WHEN h.StartShift BETWEEN '2025-06-01' AND '2025-08-31'
-                THEN h.HoursWorked END) / 13, 2) AS Q3_Avg,
-
-            ROUND(SUM(CASE
-                WHEN h.StartShift BETWEEN '2025-09-01' AND '2025-11-30'
-                THEN h.HoursWorked END) / 13, 2) AS Q4_Avg,
-
-            ROUND(SUM(h.HoursWorked) / 52, 2) AS Yearly_Avg
-
-        FROM Employee e
-        INNER JOIN Hours as h
-            ON e.EmployeeID = h.EmployeeID
-        INNER JOIN Department as d
-            On e.DeptID = d.DeptID
-        GROUP BY e.EmployeeID, e.FirstName, e.LastName
-        ORDER BY d.Name, e.LastName, e.FirstName;
-    """
-
-    cur.execute(query)
-    results = cur.fetchall()
-    cur.close()
+from datetime import date, datetime, timedelta
+
+from bacchusDB import get_connection, warningsAllowed
+from queryTrace import executeQuery, tracedCursor
+from fiscalPeriods import GRANULARITIES, SOURCES, buildHoursQuery, buildPeriods, pivotHours
+from tableFormat import printTable
+
+# Covering index on Hours (see Bacchus_Database_Creation.sql) that the report should be read from.
+HOURS_INDEX = "idx_hours_emp_shift"
+
+# Index each source should be read through: HoursDaily is clustered on (EmployeeID, WorkDate).
+SOURCE_INDEX = {"hours": HOURS_INDEX, "daily": "PRIMARY"}
 
-    return results
+# Both indexes lead with EmployeeID (INT NOT NULL, 4 bytes). A plan whose key_len is no longer than that
+# looks up the employee only and reads every punch they ever had, not just the report window.
+EMPLOYEE_KEY_LEN = 4
 
-def displayTable(table):
-    headers = [
-        "Department",
-        "Last Name",
-        "First Name",
-        "Q1 Avg",
-        "Q2 Avg",
-        "Q3 Avg",
-        "Q4 Avg",
-        "Year Avg"
-    ]
+# The report year, split into quarters. Each period is a half-open range (>= start, < next start)
+# and the WHERE clause limits the scan to the report window instead of the whole punch history.
+FISCAL_YEAR_START = date(2024, 12, 1)
+DEFAULT_PERIODS = buildPeriods(FISCAL_YEAR_START, "quarter", 4)
 
-    strData = [[("" if col is None else str(col)) for col in row] for row in table]
+HOURS_QUERY, HOURS_PARAMS = buildHoursQuery(DEFAULT_PERIODS)
 
-    colWidth = []
-    for colIDX in range(len(headers)):
-        longest = len(headers[colIDX])
-        for row in strData:
-            longest = max(longest, len(row[colIDX]))
-        colWidth.append(longest)
+def fetchHoursWorked(conn, periods=DEFAULT_PERIODS, source="hours"):
+    # Returns (EmployeeID, Dept, First, Last, weekly avg per period..., overall weekly avg) per employee.
+    # source="daily" reads the HoursDaily rollup instead of every punch in Hours.
+    query, params = buildHoursQuery(periods, source)
 
-    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
+    cur = tracedCursor(conn, prepared=True) # Server-side prepared: the dates go as binary parameters, not inlined text.
+    executeQuery(cur, query, f"Hours Worked ({source})", params)
+    results = cur.fetchall()
+    cur.close()
 
-    print(formatString.format(*headers))
-    print("-" * (sum(colWidth) + 3 * (len(headers) - 1)))
+    return pivotHours(results, periods)
 
-    if not table:
-        print("(No Data to Display)")
-        return
+def hoursHeaders(periods):
+    spansYear = (periods[-1].end - periods[0].start).days in (365, 366)
+    return (
+        ["Department", "Last Name", "First Name"]
+        + [f"{period.label} Avg" for period in periods]
+        + ["Year Avg" if spansYear else "Overall Avg"]
+    )
 
-    for row in strData:
-        print(formatString.format(*row))
+HOURS_HEADERS = hoursHeaders(DEFAULT_PERIODS)
 
 def formatData(table):
     formatted = []
     for row in table:
-        empID, dept, first, last, q1, q2, q3, q4, year = row
+        empID, dept, first, last, *averages = row
         formatted.append((
             dept,
             last,
             first,
-            q1 or 0,
-            q2 or 0,
-            q3 or 0,
-            q4 or 0,
-            year or 0
+            *[average or 0 for average in averages]
         ))
     return formatted
 
+def explainHoursWorked(conn, periods=DEFAULT_PERIODS, source="hours"):
+    # Runs EXPLAIN on the report query and returns (indexUsed, plan rows for the Hours table).
+    # The report should range-scan the covering index: key = HOURS_INDEX, "Using index" in Extra, type
+    # "range", and a key_len that reaches past EmployeeID into the date column. Type "index" is a full scan
+    # of the index and "ref" on EmployeeID alone reads the employee's whole history; both grow with it.
+    # (HoursDaily is read through its clustered primary key, which never reports "Using index".)
+    query, params = buildHoursQuery(periods, source)
+
+    with warningsAllowed(conn): # MySQL 8 adds Note 1003 to every EXPLAIN.
+        cur = conn.cursor()
+        cur.execute("EXPLAIN " + query, params)
+        names = [desc[0].lower() for desc in cur.description]
+        plan = [dict(zip(names, row)) for row in cur.fetchall()]
+        cur.close()
+
+    hoursPlan = [step for step in plan if step["table"] == "h"]
+    indexUsed = bool(hoursPlan) and all(
+        step["key"] == SOURCE_INDEX[source]
+        and step["type"] == "range"
+        and int(step["key_len"] or 0) > EMPLOYEE_KEY_LEN
+        and (source != "hours" or "Using index" in (step["extra"] or ""))
+        for step in hoursPlan
+    )
+    return indexUsed, hoursPlan
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Average hours worked per quarter by each employee.")
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help=f"check with EXPLAIN that the report reads Hours through {HOURS_INDEX}"
+    )
+    parser.add_argument(
+        "--fiscal-start",
+        type=date.fromisoformat,
+        default=FISCAL_YEAR_START,
+        help=f"first day of the fiscal year, YYYY-MM-DD (default: {FISCAL_YEAR_START})"
+    )
+    parser.add_argument(
+        "--granularity",
+        choices=GRANULARITIES,
+        default="quarter",
+        help="length of each period (default: quarter)"
+    )
+    parser.add_argument(
+        "--periods",
+        type=int,
+        default=4,
+        help="number of periods to report (default: 4)"
+    )
+    parser.add_argument(
+        "--source",
+        choices=list(SOURCES),
+        default="hours",
+        help="read raw punches from Hours, or the HoursDaily rollup (default: hours)"
+    )
+    args = parser.parse_args()
+
+    if args.periods < 1:
+        parser.error("--periods must be at least 1")
+
+    return args
+
 def main():
-    try:
-        conn = mysql.connector.connect(**config)
-        if not conn.is_connected():
-            print("Could not connect to database.")
-            return
+    args = parseArgs()
+    periods = buildPeriods(args.fiscal_start, args.granularity, args.periods)
 
-        results = fetchHoursWorked(conn)
+    try:
+        with get_connection() as conn:
+            if args.explain:
+                indexUsed, hoursPlan = explainHoursWorked(conn, periods, args.source)
+                table = SOURCES[args.source][0]
+                index = SOURCE_INDEX[args.source]
+                for step in hoursPlan:
+                    print(f"{table} plan: type={step['type']} key={step['key']} key_len={step['key_len']} rows={step['rows']} extra={step['extra']}")
+                if indexUsed:
+                    print(f"OK - the report range-scans {table} through {index}.")
+                else:
+                    print(f"WARNING - the report is not range-scanning {index}; check the index exists and ANALYZE TABLE {table}.")
+                return
+
+            results = fetchHoursWorked(conn, periods, args.source)
         results = formatData(results)
 
-        print("\nAverage Hours Worked Per Quarter (Last Year)")
-        displayTable(results)
-
-        conn.close()
+        print(f"\nAverage Hours Worked Per Week, by {args.granularity.title()} ({periods[0].start} to {periods[-1].end - timedelta(days=1)})")
+        printTable(hoursHeaders(periods), results)
 
     except Error as e:
         print("Error:", e)
@@ -2,132 +2,151 @@
 # Carolina Rodriguez
 #Report for Wine Distribution and Sales
 
-import mysql.connector
-from mysql.connector import Error
-from dotenv import load_dotenv
-import os
-
-# Load .env file
-load_dotenv("setup.env")
-
-# Read database credentials from environment variables
-db_user = os.getenv("DB_USER")
-db_password = os.getenv("DB_PASSWORD")
-db_host = os.getenv("DB_HOST")
-db_database = os.getenv("DB_NAME")
-
-if not all([db_user, db_password, db_host, db_database]):
-    raise ValueError("One or more database environment variables are missing in setup.env")
-
-config = {
-     "host": db_host,
-    "user": db_user,
-    "password": db_password,
-    "database": db_database,
-    "raise_on_warnings": True #not in .env file
-}
-
-# Function to print data in aligned columns
-
-def printAlignedData(cursor, data):
-    headers = [desc[0] for desc in cursor.description]
-
-    strData = [[("" if col is None else str(col)) for col in row] for row in data]
+import argparse
 
-    colWidth = []
-    for colIDX in range(len(headers)):
-        longest = len(headers[colIDX])
-        for row in strData:
-            longest = max(longest, len(row[colIDX]))
-        colWidth.append(longest)
-
-    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
-
-    print(formatString.format(*headers))
-
-    separatorLength = sum(colWidth) + (3 * (len(headers) - 1))
-    print("-" * separatorLength)
-
-    if not data:
-        print("(No Data to Display)")
-
-    for row in strData:
-        print(formatString.format(*row))
+from mysql.connector import Error
 
+from bacchusDB import get_connection
+from queryTrace import executeQuery, tracedCursor
+from rollups import refreshWineSalesSummary
+from tableFormat import printStreamingData
 
-def run_query(cursor, query, description):
+def run_query(cursor, query, description, params=None):
     print("\n" + "="*70)
     print(description)
     print("-"*70)
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    printAlignedData(cursor, rows)
+    executeQuery(cursor, query, description, params)
+    return printStreamingData(cursor)
+
+# Wine distribution: the top wines of each distributor, one page of distributors at a time.
+# Pages are keyset on DistID (distributors after the last one shown), so a page only joins its own
+# distributors' orders, through DistOrder(DistID, OrderID) and DistItemOrder(OrderID, WineID, Quantity).
+# Params: (DistID to start after, distributors per page, wines per distributor)
+DEFAULT_PAGE_SIZE = 10
+DEFAULT_TOP_WINES = 5
+
+WINE_BY_DIST_QUERY = """
+WITH page AS (
+    SELECT DistID, Name
+    FROM Distributor
+    WHERE DistID > %s
+    ORDER BY DistID
+    LIMIT %s
+),
+wineTotals AS (
+    SELECT
+        p.DistID,
+        p.Name AS Distributor,
+        doi.WineID,
+        SUM(doi.Quantity) AS TotalOrdered
+    FROM page p
+    JOIN DistOrder o
+        ON o.DistID = p.DistID
+    JOIN DistItemOrder doi
+        ON doi.OrderID = o.OrderID
+    GROUP BY p.DistID, p.Name, doi.WineID
+),
+ranked AS (
+    SELECT
+        wt.*,
+        ROW_NUMBER() OVER (PARTITION BY wt.DistID ORDER BY wt.TotalOrdered DESC, wt.WineID) AS WineRank
+    FROM wineTotals wt
+)
+SELECT 
+    w.WineID,
+    w.Name,
+    w.YearProduced,
+    r.DistID,
+    r.Distributor,
+    r.TotalOrdered,
+    r.WineRank
+FROM ranked r
+JOIN Wine w 
+    ON w.WineID = r.WineID
+WHERE r.WineRank <= %s
+ORDER BY r.DistID, r.WineRank;
+"""
+WINE_BY_DIST_PARAMS = (0, DEFAULT_PAGE_SIZE, DEFAULT_TOP_WINES)
+
+# Total sold per wine (read from the WineSalesSummary rollup, see rollups.py)
+WINE_SOLD_QUERY = """
+SELECT 
+    w.WineID,
+    w.Name,
+    w.YearProduced,
+    s.TotalSold,
+    s.LastOrderDate
+FROM WineSalesSummary s
+JOIN Wine w
+    ON w.WineID = s.WineID
+WHERE s.TotalSold > 0
+ORDER BY s.TotalSold DESC;
+"""
+
+# Wines that haven't sold
+WINE_NOT_SOLD_QUERY = """
+SELECT 
+    w.WineID,
+    w.Name,
+    w.YearProduced,
+    s.TotalSold AS NotSold
+FROM WineSalesSummary s
+JOIN Wine w
+    ON w.WineID = s.WineID
+WHERE s.TotalSold = 0
+ORDER BY w.WineID;
+"""
+
+def lastDistributor(cursor, after, pageSize):
+    # The last DistID on the page, for --after on the next one (None when this was the last page).
+    cursor.execute(
+        "SELECT MAX(DistID), COUNT(*) FROM (SELECT DistID FROM Distributor WHERE DistID > %s ORDER BY DistID LIMIT %s) AS page;",
+        (after, pageSize)
+    )
+    lastID, count = cursor.fetchone()
+    return lastID if count == pageSize else None
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Wine distribution and sales report.")
+    parser.add_argument(
+        "--after",
+        type=int,
+        default=0,
+        help="show distributors after this DistID (default: 0, the first page)"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"distributors per page (default: {DEFAULT_PAGE_SIZE})"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_WINES,
+        help=f"wines shown per distributor, by quantity ordered (default: {DEFAULT_TOP_WINES})"
+    )
+    return parser.parse_args()
 
 def main():
+    args = parseArgs()
+
     try:
-        conn = mysql.connector.connect(**config)
-        if not conn.is_connected():
-            print("Could not connect to database.")
-            return
-        cursor = conn.cursor()
-
-        # SQL Wine distribution, ordered by distributor
-        wineByDist = """
-        SELECT 
-            w.WineID,
-            w.Name,
-            w.YearProduced,
-            d.DistID,
-            d.Name
-        FROM distributor d
-        JOIN distorder o
-            ON d.DistID = o.DistID
-        JOIN distitemorder doi
-            ON o.OrderID = doi.OrderID
-        JOIN wine w 
-            ON doi.WineID = w.WineID
-        ORDER BY d.DistID, d.Name
-        LIMIT 0, 30;
-        """
-        #
-        run_query(cursor, wineByDist, "Wine Distribution (by Distributor)")
-
-        # Total sold per wine
-        wineSold = """
-        SELECT 
-            w.WineID,
-            w.Name,
-            w.YearProduced,
-            SUM(dio.Quantity) AS TotalSold
-        FROM Wine w
-        JOIN DistItemOrder dio 
-            ON w.WineID = dio.WineID
-        GROUP BY 
-            w.WineID, 
-            w.Name, 
-            w.YearProduced
-        ORDER BY TotalSold DESC;
-        """
-        run_query(cursor, wineSold, "Total Sold per Wine")
-
-        # Wines that haven't sold
-        wineNOTsold = """
-        SELECT 
-            w.WineID,
-            w.Name,
-            w.YearProduced,
-            COALESCE(SUM(dio.Quantity), 0) AS NotSold
-        FROM wine w
-        LEFT JOIN distitemorder dio
-            ON w.WineID = dio.WineID
-        GROUP BY w.WineID, w.Name, w.YearProduced
-        HAVING NotSold = 0
-        ORDER BY w.WineID;
-        """
-        run_query(cursor, wineNOTsold, "Wines That Haven't Sold")
-
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            refreshWineSalesSummary(conn) # Only counts the line items added since the last refresh.
+            cursor = tracedCursor(conn)
+
+            run_query(
+                cursor, WINE_BY_DIST_QUERY, "Wine Distribution (by Distributor)",
+                (args.after, args.page_size, args.top)
+            )
+            nextAfter = lastDistributor(cursor, args.after, args.page_size)
+            if nextAfter is not None:
+                print(f"Next page: --after {nextAfter}")
+            run_query(cursor, WINE_SOLD_QUERY, "Total Sold per Wine")
+            run_query(cursor, WINE_NOT_SOLD_QUERY, "Wines That Haven't Sold")
+
+            cursor.close()
 
     except Error as e:
         print("Error: ", e)
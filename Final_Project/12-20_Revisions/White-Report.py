@@ -3,124 +3,178 @@
 # Group Project - Bacchus Winery Report
 # Expected vs. Actual Delivery
 
-import mysql.connector
-from mysql.connector import Error
-import dotenv
-from dotenv import dotenv_values
+import argparse
+from datetime import date
 
-import mysql.connector
 from mysql.connector import Error
-from dotenv import dotenv_values
-
-secrets = dotenv_values("setup.env")
-
-config = {
-    "user": secrets["DB_USER"],
-    "password": secrets["DB_PASSWORD"],
-    "host": secrets["DB_HOST"],
-    "database": secrets["DB_NAME"],
-    "raise_on_warnings": True
-}
-
-def printAlignedData(cursor, data):
-    """Print rows in aligned columns, using cursor.description for headers."""
-
-    headers = [desc[0] for desc in cursor.description]
-
-    strData = [[("" if col is None else str(col)) for col in row] for row in data]
-
-
-    colWidth = []
-    for colIDX in range(len(headers)):
-        longest = len(headers[colIDX])
-        for row in strData:
-            longest = max(longest, len(row[colIDX]))
-        colWidth.append(longest)
-
-    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
 
-
-    print(formatString.format(*headers))
-
-
-    separatorLength = sum(colWidth) + (3 * (len(headers) - 1))
-    print("-" * separatorLength)
-
-
-    if not data:
-        print("(No Data to Display)")
-        return
-
-    for row in strData:
-        print(formatString.format(*row))
+from bacchusDB import get_connection
+from queryTrace import executeQuery, tracedCursor
+from tableFormat import printRowStream, printStreamingData
+
+# Report: expected vs actual delivery (every supplier at once; used by the report runner and exports)
+DELIVERY_QUERY = """
+    SELECT 
+        sd.InvoiceID,
+        s.Name,
+        sd.ExpectedDelivery,
+        sd.ActualDelivery,
+        DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery) AS DaysDifference,
+        CASE 
+            WHEN sd.ActualDelivery IS NULL THEN 'Pending'
+            WHEN sd.ActualDelivery < sd.ExpectedDelivery THEN 'Early'
+            WHEN sd.ActualDelivery = sd.ExpectedDelivery THEN 'On Time'
+            WHEN sd.ActualDelivery > sd.ExpectedDelivery THEN 'Late'
+        END AS DeliveryStatus
+     
+    FROM SupplierDelivery AS sd
+    INNER JOIN Supplier AS s
+        ON sd.SupplierID = s.SupplierID
+    ORDER BY s.Name, sd.ExpectedDelivery, sd.InvoiceID;
+"""
+
+# One page of one supplier's deliveries, read in order from the SupplierDelivery(SupplierID, ExpectedDelivery)
+# index (InnoDB keeps InvoiceID at the end of it). Pages are keyset on (ExpectedDelivery, InvoiceID), so
+# deliveries without an ExpectedDelivery are not paged.
+# Params: (SupplierID, after date, after date, after InvoiceID, page size)
+DELIVERY_PAGE_QUERY = """
+    SELECT 
+        sd.InvoiceID,
+        s.Name,
+        sd.ExpectedDelivery,
+        sd.ActualDelivery,
+        DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery) AS DaysDifference,
+        CASE 
+            WHEN sd.ActualDelivery IS NULL THEN 'Pending'
+            WHEN sd.ActualDelivery < sd.ExpectedDelivery THEN 'Early'
+            WHEN sd.ActualDelivery = sd.ExpectedDelivery THEN 'On Time'
+            WHEN sd.ActualDelivery > sd.ExpectedDelivery THEN 'Late'
+        END AS DeliveryStatus
+    FROM SupplierDelivery AS sd
+    INNER JOIN Supplier AS s
+        ON sd.SupplierID = s.SupplierID
+    WHERE sd.SupplierID = %s
+      AND (sd.ExpectedDelivery > %s OR (sd.ExpectedDelivery = %s AND sd.InvoiceID > %s))
+    ORDER BY sd.ExpectedDelivery, sd.InvoiceID
+    LIMIT %s;
+"""
+DELIVERY_HEADERS = ["InvoiceID", "Name", "ExpectedDelivery", "ActualDelivery", "DaysDifference", "DeliveryStatus"]
+DEFAULT_PAGE_SIZE = 50
+FIRST_PAGE = (date(1000, 1, 1), 0) # before every ExpectedDelivery
+
+# Summary: average days difference per supplier, from the trigger-maintained SupplierDeliveryStats
+DELIVERY_SUMMARY_QUERY = """
+    SELECT
+        s.SupplierID,
+        s.Name,
+        st.TotalDeliveries,
+        st.PendingDeliveries,
+        ROUND(st.SumDaysDifference / NULLIF(st.MeasuredDeliveries, 0), 2) AS AvgDaysDifference,
+        st.EarlyCount,
+        st.OnTimeCount,
+        st.LateCount
+    FROM SupplierDeliveryStats AS st
+    JOIN Supplier AS s
+        ON st.SupplierID = s.SupplierID
+    ORDER BY AvgDaysDifference DESC, s.Name;
+"""
+
+# Summary by supplier and expected delivery month
+DELIVERY_MONTHLY_QUERY = """
+    SELECT
+        s.SupplierID,
+        s.Name,
+        DATE_FORMAT(st.MonthStart, '%Y-%m') AS Month,
+        st.TotalDeliveries,
+        st.PendingDeliveries,
+        ROUND(st.SumDaysDifference / NULLIF(st.MeasuredDeliveries, 0), 2) AS AvgDaysDifference,
+        st.LateCount
+    FROM SupplierDeliveryMonthStats AS st
+    JOIN Supplier AS s
+        ON st.SupplierID = s.SupplierID
+    ORDER BY s.Name, st.MonthStart;
+"""
+
+
+def fetchDeliveryPage(cursor, supplierID, after, pageSize):
+    # Returns one page of deliveries after `after` = (ExpectedDelivery, InvoiceID).
+    afterDate, afterInvoice = after
+    executeQuery(
+        cursor, DELIVERY_PAGE_QUERY, f"Deliveries for supplier {supplierID}",
+        (supplierID, afterDate, afterDate, afterInvoice, pageSize)
+    )
+    return cursor.fetchall()
+
+
+def parseAfter(text):
+    # "YYYY-MM-DD:InvoiceID", as printed at the end of a page.
+    expected, invoiceID = text.split(":")
+    return date.fromisoformat(expected), int(invoiceID)
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Supplier expected vs actual delivery report.")
+    parser.add_argument(
+        "--supplier",
+        type=int,
+        default=None,
+        help="show one page of this SupplierID's deliveries instead of every supplier's "
+             "(deliveries with no ExpectedDelivery are only in the full report)"
+    )
+    parser.add_argument(
+        "--after",
+        type=parseAfter,
+        default=FIRST_PAGE,
+        help="with --supplier, start after this delivery, YYYY-MM-DD:InvoiceID (printed at the end of each page)"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"with --supplier, deliveries per page (default: {DEFAULT_PAGE_SIZE})"
+    )
+    parser.add_argument(
+        "--monthly",
+        action="store_true",
+        help="also show the summary by supplier and month"
+    )
+    return parser.parse_args()
 
 
 def main():
-    try:
-        conn = mysql.connector.connect(**config)
-        if not conn.is_connected():
-            print("Could not connect to database.")
-            return
-
-        cursor = conn.cursor()
-
-        # Report: expected vs actual delivery
-        query = """
-            SELECT 
-                sd.InvoiceID,
-                s.Name,
-                sd.ExpectedDelivery,
-                sd.ActualDelivery,
-                DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery) AS DaysDifference,
-                CASE 
-                    WHEN sd.ActualDelivery IS NULL THEN 'Pending'
-                    WHEN sd.ActualDelivery < sd.ExpectedDelivery THEN 'Early'
-                    WHEN sd.ActualDelivery = sd.ExpectedDelivery THEN 'On Time'
-                    WHEN sd.ActualDelivery > sd.ExpectedDelivery THEN 'Late'
-                END AS DeliveryStatus
-             
-            FROM SupplierDelivery AS sd
-            INNER JOIN Supplier AS s
-                ON sd.SupplierID = s.SupplierID
-            ORDER BY s.Name, sd.ExpectedDelivery, sd.InvoiceID;
-        """
-
-        avg_query = """
-                    SELECT s.SupplierID, \
-                           s.Name, \
-                           COUNT(*)                                                        AS TotalDeliveries, \
-                           SUM(CASE WHEN sd.ActualDelivery IS NULL THEN 1 ELSE 0 END)      AS PendingDeliveries, \
-                           ROUND(AVG(DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery)), 2) AS AvgDaysDifference
-                    FROM SupplierDelivery AS sd
-                             JOIN Supplier AS s
-                                  ON sd.SupplierID = s.SupplierID
-                    WHERE sd.ActualDelivery IS NOT NULL
-                    GROUP BY s.SupplierID, s.Name
-                    ORDER BY AvgDaysDifference DESC, s.Name; \
-                    """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        print("=" * 70)
-        print("Supplier Delivery Report - Expected vs Actual")
-        print("=" * 70)
-        printAlignedData(cursor, rows)
-
-        cursor.execute(avg_query)
-        avg_rows = cursor.fetchall()
-
-        print("\n" + "=" * 70)
-        print("Supplier Delivery Summary - Average Days Difference")
-        print("=" * 70)
-        printAlignedData(cursor, avg_rows)
-
-
-
-        cursor.close()
-        conn.close()
-
+    args = parseArgs()
 
+    try:
+        with get_connection() as conn:
+            cursor = tracedCursor(conn)
+
+            print("=" * 70)
+            print("Supplier Delivery Report - Expected vs Actual")
+            print("=" * 70)
+            if args.supplier is not None:
+                page = fetchDeliveryPage(cursor, args.supplier, args.after, args.page_size)
+                printRowStream(DELIVERY_HEADERS, page)
+                if len(page) == args.page_size:
+                    print(f"Next page: --after {page[-1][2]}:{page[-1][0]}")
+            else:
+                # One streamed query; unlike the pages, it includes deliveries with no ExpectedDelivery.
+                executeQuery(cursor, DELIVERY_QUERY, "Supplier Delivery Report")
+                printStreamingData(cursor)
+
+            print("\n" + "=" * 70)
+            print("Supplier Delivery Summary - Average Days Difference")
+            print("=" * 70)
+            executeQuery(cursor, DELIVERY_SUMMARY_QUERY, "Supplier Delivery Summary")
+            printStreamingData(cursor)
+
+            if args.monthly:
+                print("\n" + "=" * 70)
+                print("Supplier Delivery Summary - By Month")
+                print("=" * 70)
+                executeQuery(cursor, DELIVERY_MONTHLY_QUERY, "Supplier Delivery Summary by Month")
+                printStreamingData(cursor)
+
+            cursor.close()
 
     except Error as e:
         print("Error:", e)
@@ -0,0 +1,180 @@
+# Blue Group -  CSD-310
+# asyncio versions of the Bacchus reports, for a service answering many report requests at once.
+
+# Uses aiomysql: one asyncio connection pool (sized by DB_POOL_SIZE in setup.env) is shared by every
+# request, and asyncio.gather fans the reports out, so a single process and thread can keep many queries
+# in flight instead of parking a thread on each one. The SQL is the same as the blocking reports use.
+# The summary-table refreshes are short locking writes that stay on mysql.connector: they run once, in a
+# worker thread, before the fan-out, not once per request.
+
+import argparse
+import asyncio
+import importlib
+import sys
+import time
+
+from mysql.connector import Error
+
+from bacchusDB import get_connection, loadConfig
+from deliveryAnalytics import (
+    DEFAULT_DAYS, LATENESS_HEADERS, LATENESS_HISTOGRAM_QUERY, LATENESS_WINDOW_QUERY,
+    LATEST_DELIVERY_QUERY, histogramParams, latenessFromHistogram, windowParams,
+)
+from fiscalPeriods import buildHoursQuery, pivotHours
+from reportRunner import REPORTS, SUMMARY_REFRESH, printResults, printTimings
+
+try:
+    import aiomysql
+except ImportError: # aiomysql is only needed for the async path.
+    aiomysql = None
+
+hoursReport = importlib.import_module("Breutzmann-Report")
+
+PARSE_ERROR = 1064 # ER_PARSE_ERROR: the server has no CTEs / window functions.
+
+
+async def createPool():
+    # An aiomysql pool with the setup.env connection settings.
+    if aiomysql is None:
+        raise RuntimeError("The async reports require aiomysql to be installed.")
+
+    config, poolSize = loadConfig()
+    return await aiomysql.create_pool(
+        host=config["host"],
+        user=config["user"],
+        password=config["password"],
+        db=config["database"],
+        minsize=1,
+        maxsize=poolSize,
+        autocommit=True # Each report reads a fresh snapshot instead of a long-lived transaction.
+    )
+
+
+async def fetchAsync(pool, query, params=None):
+    # Runs one query on a pooled connection. Returns (headers, rows).
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+            headers = [desc[0] for desc in cursor.description]
+    return headers, list(rows)
+
+
+async def refreshSummariesAsync(names):
+    # Brings the summary tables the reports read up to date, each once, on one blocking pooled connection
+    # in a thread. Run it before fanning out: one thread per report would exhaust the connector's pool.
+    refreshes = list(dict.fromkeys(SUMMARY_REFRESH[name] for name in names if name in SUMMARY_REFRESH))
+    if not refreshes:
+        return
+
+    def refresh():
+        with get_connection() as conn:
+            for refreshSummary in refreshes:
+                refreshSummary(conn)
+    await asyncio.to_thread(refresh)
+
+
+async def fetchHoursWorkedAsync(pool, periods=hoursReport.DEFAULT_PERIODS, source="hours"):
+    # Async fetchHoursWorked: same query, same pivot.
+    query, params = buildHoursQuery(periods, source)
+    headers, rows = await fetchAsync(pool, query, params)
+    return pivotHours(rows, periods)
+
+
+async def fetchSupplierLatenessAsync(pool, asOf=None, days=DEFAULT_DAYS):
+    # Async fetchSupplierLateness, with the same histogram fallback for servers without window functions.
+    if asOf is None:
+        headers, rows = await fetchAsync(pool, LATEST_DELIVERY_QUERY)
+        asOf = rows[0][0]
+        if asOf is None:
+            return LATENESS_HEADERS, []
+
+    try:
+        headers, rows = await fetchAsync(pool, LATENESS_WINDOW_QUERY, windowParams(asOf, days))
+        return LATENESS_HEADERS, rows
+    except aiomysql.ProgrammingError as e:
+        if e.args[0] != PARSE_ERROR:
+            raise
+    headers, rows = await fetchAsync(pool, LATENESS_HISTOGRAM_QUERY, histogramParams(asOf, days))
+    return LATENESS_HEADERS, latenessFromHistogram(rows)
+
+
+async def runReportAsync(pool, name):
+    # Returns (headers, rows, seconds) for one REPORTS entry. Summary tables are not refreshed here;
+    # see refreshSummariesAsync.
+    started = time.perf_counter()
+    if name == "hours":
+        headers, rows = hoursReport.HOURS_HEADERS, hoursReport.formatData(await fetchHoursWorkedAsync(pool))
+    elif name == "delivery-lateness":
+        headers, rows = await fetchSupplierLatenessAsync(pool)
+    else:
+        title, query, params, tables, report = REPORTS[name]
+        headers, rows = await fetchAsync(pool, query, params)
+    return headers, rows, time.perf_counter() - started
+
+
+async def runReportsAsync(pool, names):
+    # Runs every report at once. Returns {name: (headers, rows, seconds) or the exception it raised}.
+    results = await asyncio.gather(*(runReportAsync(pool, name) for name in names), return_exceptions=True)
+    return dict(zip(names, results))
+
+
+async def serveRequests(names, requests):
+    # Simulates `requests` users each asking for every report at the same time, over one shared pool.
+    pool = await createPool()
+    try:
+        started = time.perf_counter()
+        await refreshSummariesAsync(names)
+        batches = await asyncio.gather(*(runReportsAsync(pool, names) for _ in range(requests)))
+        wallTime = time.perf_counter() - started
+    finally:
+        pool.close()
+        await pool.wait_closed()
+    return batches, wallTime
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Run the Bacchus reports with asyncio and aiomysql.")
+    parser.add_argument(
+        "reports",
+        nargs="*",
+        help=f"reports to run, any of: {', '.join(REPORTS)} (default: all)"
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=1,
+        help="concurrent copies of the whole set of reports, as if that many users asked at once (default: 1)"
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(unknown)}")
+
+    return args
+
+
+def main():
+    args = parseArgs()
+    names = args.reports or list(REPORTS)
+
+    try:
+        batches, wallTime = asyncio.run(serveRequests(names, args.requests))
+    except (Error, RuntimeError) as e:
+        print("Error:", e)
+        return
+    except Exception as e:
+        if aiomysql is None or not isinstance(e, aiomysql.Error):
+            raise
+        print("Error:", e)
+        return
+
+    printResults(names, batches[0], sys.stdout)
+    printTimings(names, batches[0], wallTime, sys.stdout)
+    if args.requests > 1:
+        print(f"\n{args.requests} concurrent requests x {len(names)} reports in {wallTime:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
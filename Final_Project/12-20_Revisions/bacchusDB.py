@@ -0,0 +1,94 @@
+# Blue Group -  CSD-310
+# Shared database access for the Bacchus report and generator scripts.
+
+# Every script used to read setup.env and open its own mysql.connector connection.
+# This module reads setup.env once and hands out connections from a mysql.connector pool,
+# so scripts run back-to-back (or together) in one process reuse the same connections.
+
+import threading
+from contextlib import contextmanager
+
+from mysql.connector import pooling
+from dotenv import dotenv_values
+
+ENV_FILE = "setup.env"
+DEFAULT_POOL_SIZE = 1
+
+_pools = {}
+_poolLock = threading.Lock() # Threads in the report runner may all ask for the pool at once.
+
+
+def loadConfig(envFile=ENV_FILE):
+    secrets = dotenv_values(envFile)
+
+    required = ["DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"]
+    if not all(secrets.get(key) for key in required):
+        raise ValueError(f"One or more database environment variables are missing in {envFile}")
+
+    config = {
+        "user": secrets["DB_USER"],
+        "password": secrets["DB_PASSWORD"],
+        "host": secrets["DB_HOST"],
+        "database": secrets["DB_NAME"],
+        "raise_on_warnings": True #not in .env file
+    }
+
+    poolSize = int(secrets.get("DB_POOL_SIZE") or DEFAULT_POOL_SIZE)
+
+    return config, poolSize
+
+
+def getPool(allowLocalInfile=False, usePure=None, database=None):
+    # One pool per set of connection options; LOAD DATA LOCAL INFILE needs its own connections.
+    # usePure=True forces the pure-Python protocol, False the C extension, None the connector's default.
+    # database overrides DB_NAME (the benchmark uses a scratch copy of the schema).
+    # Pools are per process - worker processes should be started with "spawn" so they build their own.
+    key = (allowLocalInfile, usePure, database)
+    with _poolLock:
+        if key not in _pools:
+            config, poolSize = loadConfig()
+            if usePure is not None:
+                config["use_pure"] = usePure
+            if database is not None:
+                config["database"] = database
+
+            name = "bacchus"
+            if database is not None:
+                name += "_" + database
+            if allowLocalInfile:
+                name += "_infile"
+            if usePure is not None:
+                name += "_pure" if usePure else "_cext"
+
+            _pools[key] = pooling.MySQLConnectionPool(
+                pool_name=name,
+                pool_size=poolSize,
+                allow_local_infile=allowLocalInfile,
+                **config
+            )
+        return _pools[key]
+
+
+@contextmanager
+def get_connection(allowLocalInfile=False, usePure=None, database=None):
+    # Borrows a connection from the pool for the length of a with-block.
+    conn = getPool(allowLocalInfile, usePure, database).get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close() # Returns the connection to the pool instead of disconnecting.
+
+
+@contextmanager
+def warningsAllowed(conn):
+    # Turns raise_on_warnings (and warning retrieval) off for the length of a with-block. For statements
+    # whose notes are expected, e.g. MySQL 8 always adds Note 1003 (the rewritten query) to EXPLAIN.
+    cnx = getattr(conn, "_cnx", conn) # A pooled connection forwards reads only, so set it on the real one.
+    raiseOnWarnings, getWarnings = cnx.raise_on_warnings, cnx.get_warnings
+    cnx.raise_on_warnings = False
+    cnx.get_warnings = False
+    try:
+        yield conn
+    finally:
+        cnx.get_warnings = getWarnings
+        cnx.raise_on_warnings = raiseOnWarnings
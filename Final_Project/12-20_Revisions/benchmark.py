@@ -0,0 +1,355 @@
+# Blue Group -  CSD-310
+# Benchmark suite for the Bacchus generator and reports.
+
+# Builds a synthetic dataset in a scratch database (a copy of the BacchusWineryDB schema, so the
+# real data is never touched), scaled by --scale or the per-table options, then runs each generator
+# stage and report query --repeat times. p50/p95 latency, rows/sec and peak RSS for every stage are
+# written to a JSON file; pass an earlier file to --compare to see what got faster or slower.
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from mysql.connector import Error
+
+import generateOrders as orderGenerator
+from bacchusDB import get_connection, loadConfig
+from loadHelpers import chunkRows
+from rollups import refreshHoursDaily
+from tableFormat import printTable
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is just left out.
+    resource = None
+
+generator = importlib.import_module("Breutzmann-GenerateHours")
+reportRunner = importlib.import_module("reportRunner")
+hoursReport = importlib.import_module("Breutzmann-Report")
+
+BENCH_DATABASE = "BacchusWineryBench"
+
+# Every table is recreated (empty) in the scratch database with CREATE TABLE ... LIKE, which copies
+# the columns and indexes but not the foreign keys or triggers (generateOrders rebuilds the stats).
+TABLES = [
+    "Department", "Employee", "Hours", "HoursDaily", "HoursGenerated", "Wine", "WineInventory",
+    "Supplier", "SupplyItem", "SupplyInventory", "SupplierDelivery", "SupplierItemDelivery",
+    "Distributor", "ShipService", "Shipment", "DistOrder", "DistItemOrder",
+    "WineSalesSummary", "SummaryWatermark", "SupplierDeliveryStats", "SupplierDeliveryMonthStats",
+]
+
+# Lookup tables copied as-is from the real database. Orders and deliveries come from generateOrders.py.
+COPIED_TABLES = ["Department", "Supplier", "SupplyItem", "ShipService"]
+
+# Dataset size at --scale 1. Every value is multiplied by --scale unless set on its own.
+BASE_SCALE = {
+    "employees": 100,
+    "years": 1,
+    "wines": 12,
+    "distributors": 50,
+    "orders": 20000,
+    "deliveries": 2000,
+}
+
+WINE_NAMES = [("Merlot", "Red"), ("Cabernet", "Red"), ("Chablis", "White"), ("Chardonnay", "White")]
+END_DATE = date(2025, 11, 30) # Last day of the fiscal year the hours report reads.
+VINTAGE_YEARS = 50 # Bench wines cycle through this many vintages; MySQL's YEAR type stops at 1901.
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of a non-empty list.
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100)) # ceil(n * pct / 100)
+    return ordered[int(rank) - 1]
+
+
+def peakRSS():
+    # Highest resident set size of this process so far, in MB (None where it can't be read).
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1) # bytes on macOS
+    return round(peak / 1024, 1) # KB on Linux
+
+
+def timeStage(results, name, stage, repeat):
+    # Runs stage() -> rows handled, repeat times, and records its timings under results[name].
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = stage()
+        timings.append(time.perf_counter() - started)
+
+    p50 = percentile(timings, 50)
+    results[name] = {
+        "runs": repeat,
+        "rows": rows,
+        "p50": round(p50, 6),
+        "p95": round(percentile(timings, 95), 6),
+        "rowsPerSec": round(rows / max(p50, 1e-9), 1),
+        "peakRssMB": peakRSS(), # Process high-water mark after this stage, not just this stage's use.
+    }
+    print(f"  {name}: p50 {p50:.3f}s, {rows:,} rows")
+
+
+def resolveScale(args):
+    scale = {}
+    for key, base in BASE_SCALE.items():
+        value = getattr(args, key)
+        scale[key] = value if value is not None else max(1, round(base * args.scale))
+    return scale
+
+
+def createBenchDatabase(sourceName, benchName):
+    # Recreates every table, empty, in the scratch database and copies the small lookup tables.
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            # Looked up first rather than IF [NOT] EXISTS, whose notes count as warnings and the connection
+            # raises on warnings.
+            cur.execute("SELECT COUNT(*) FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s;", (benchName,))
+            if not cur.fetchone()[0]:
+                cur.execute(f"CREATE DATABASE `{benchName}`;")
+            cur.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s;", (benchName,))
+            existing = [name for (name,) in cur.fetchall()]
+
+            cur.execute("SET FOREIGN_KEY_CHECKS = 0;")
+            for table in existing:
+                cur.execute(f"DROP TABLE `{benchName}`.`{table}`;")
+            for table in TABLES:
+                cur.execute(f"CREATE TABLE `{benchName}`.`{table}` LIKE `{sourceName}`.`{table}`;")
+            for table in COPIED_TABLES:
+                cur.execute(f"INSERT INTO `{benchName}`.`{table}` SELECT * FROM `{sourceName}`.`{table}`;")
+            cur.execute("SET FOREIGN_KEY_CHECKS = 1;")
+            conn.commit()
+        finally:
+            cur.close()
+
+
+def insertRows(conn, cur, sql, rows, chunkSize):
+    # Inserts any iterable of rows chunkSize at a time. Returns the number of rows inserted.
+    inserted = 0
+    for chunk in chunkRows(rows, chunkSize):
+        cur.executemany(sql, chunk)
+        inserted += len(chunk)
+    conn.commit()
+    return inserted
+
+
+def loadEmployees(conn, cur, count, chunkSize):
+    # Production workers for the hours stages. Returns their EmployeeIDs.
+    rows = ((f"Worker{n}", f"Bench{n}", "Bench Worker", 3) for n in range(1, count + 1))
+    insertRows(conn, cur, "INSERT INTO Employee (FirstName, LastName, Role, DeptID) VALUES (%s, %s, %s, %s)", rows, chunkSize)
+    cur.execute("SELECT EmployeeID FROM Employee ORDER BY EmployeeID;")
+    return [empID for (empID,) in cur.fetchall()]
+
+
+def loadWines(conn, cur, count, chunkSize):
+    rows = (
+        (*WINE_NAMES[n % len(WINE_NAMES)], END_DATE.year - (n // len(WINE_NAMES)) % VINTAGE_YEARS)
+        for n in range(count)
+    )
+    return insertRows(conn, cur, "INSERT INTO Wine (Name, Type, YearProduced) VALUES (%s, %s, %s)", rows, chunkSize)
+
+
+def loadDistributors(conn, cur, count, chunkSize):
+    rows = (
+        (f"Distributor {n}", f"555{n:07d}"[-10:], f"{n} Bench Street", f"orders{n}@example.com")
+        for n in range(1, count + 1)
+    )
+    return insertRows(conn, cur, "INSERT INTO Distributor (Name, Phone, Address, Email) VALUES (%s, %s, %s, %s)", rows, chunkSize)
+
+
+def runOrderStages(conn, cur, results, scale, startDate, args):
+    # Regenerates every order, shipment and delivery on each run (--replace empties the tables first).
+    orderArgs = orderGenerator.parseArgs([
+        "--start", startDate.isoformat(),
+        "--end", END_DATE.isoformat(),
+        "--orders", str(scale["orders"]),
+        "--deliveries", str(scale["deliveries"]),
+        "--seed", str(args.seed),
+        "--replace",
+    ])
+    timeStage(
+        results, "generate-orders-multirow",
+        lambda: sum(orderGenerator.generateOrders(conn, cur, orderArgs).values()), args.repeat
+    )
+
+
+def runHoursStages(conn, cur, results, employeeIDs, startDate, args):
+    # Generation is timed on its own (rows are consumed without being stored), then the insert and rollup.
+    def generate(engine):
+        def stage():
+            return sum(1 for _ in generator.generateRows(employeeIDs, startDate, END_DATE, args.seed, engine))
+        return stage
+
+    timeStage(results, "generate-hours-python", generate("python"), args.repeat)
+    if generator.np is not None:
+        timeStage(results, "generate-hours-numpy", generate("numpy"), args.repeat)
+
+    rows = generator.ShiftStore.fromRows(generator.generateRows(employeeIDs, startDate, END_DATE, args.seed, "python"))
+
+    def insert():
+        cur.execute("TRUNCATE TABLE Hours;")
+        return generator.insertHoursBatches(conn, cur, rows, args.chunk_size, args.chunk_size * 10)
+
+    timeStage(results, "insert-hours-executemany", insert, args.repeat)
+    timeStage(results, "refresh-hours-daily", lambda: refreshHoursDaily(conn, startDate, END_DATE), args.repeat)
+
+
+def runReportStages(conn, results, args):
+    for name, (title, query, params, tables, report) in reportRunner.REPORTS.items():
+        timeStage(results, f"report-{name}", lambda: len(report(conn)[1]), args.repeat)
+
+    # The hours report again, read from the HoursDaily rollup instead of the raw punches.
+    timeStage(
+        results, "report-hours-daily",
+        lambda: len(hoursReport.fetchHoursWorked(conn, source="daily")), args.repeat
+    )
+
+
+def runBenchmark(args):
+    scale = resolveScale(args)
+    startDate = END_DATE - timedelta(days=365 * scale["years"] - 1)
+
+    print(f"Building {args.database}: " + ", ".join(f"{key}={value:,}" for key, value in scale.items()))
+    createBenchDatabase(loadConfig()[0]["database"], args.database)
+
+    results = {}
+    with get_connection(database=args.database) as conn:
+        cur = conn.cursor()
+        try:
+            employeeIDs = []
+
+            def employees():
+                employeeIDs.extend(loadEmployees(conn, cur, scale["employees"], args.chunk_size))
+                return len(employeeIDs)
+
+            # The dataset is only built once; these stages are timed a single time.
+            timeStage(results, "load-employees", employees, 1)
+            timeStage(results, "load-wines", lambda: loadWines(conn, cur, scale["wines"], args.chunk_size), 1)
+            timeStage(results, "load-distributors", lambda: loadDistributors(conn, cur, scale["distributors"], args.chunk_size), 1)
+
+            runHoursStages(conn, cur, results, employeeIDs, startDate, args)
+            runOrderStages(conn, cur, results, scale, startDate, args)
+            runReportStages(conn, results, args)
+
+        except Error:
+            conn.rollback()
+            raise
+
+        finally:
+            cur.close()
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "scale": scale,
+        "stages": results,
+    }
+
+
+def compareResults(previous, current):
+    # One row per stage: p50 before and after, and the change as a percentage (negative is faster).
+    rows = []
+    for name, stage in current["stages"].items():
+        before = previous.get("stages", {}).get(name)
+        if before is None:
+            rows.append((name, "", f"{stage['p50']:.3f}s", "new"))
+            continue
+        change = (stage["p50"] - before["p50"]) / max(before["p50"], 1e-9) * 100
+        rows.append((name, f"{before['p50']:.3f}s", f"{stage['p50']:.3f}s", f"{change:+.1f}%"))
+    return rows
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the Bacchus generator and reports on a scaled synthetic dataset.")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplies every dataset size below that isn't set on its own (default: 1)"
+    )
+    for key, base in BASE_SCALE.items():
+        parser.add_argument(
+            f"--{key}",
+            type=int,
+            default=None,
+            help=f"{key} in the dataset (default: {base:,} x scale)"
+        )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="times each generator stage and report is run (default: 5)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=310,
+        help="random seed, so runs being compared use the same data (default: 310)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="rows sent to MySQL per executemany (default: 5000)"
+    )
+    parser.add_argument(
+        "--database",
+        default=BENCH_DATABASE,
+        help=f"scratch database whose tables are dropped and recreated for the run (default: {BENCH_DATABASE})"
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark.json",
+        help="where to write the results (default: benchmark.json)"
+    )
+    parser.add_argument(
+        "--compare",
+        default=None,
+        help="an earlier results file to compare this run against"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    try:
+        report = runBenchmark(args)
+    except Error as e:
+        print("Error:", e)
+        return
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    printTable(
+        ["Stage", "Runs", "Rows", "p50", "p95", "Rows/sec", "Peak RSS (MB)"],
+        [
+            (name, stage["runs"], f"{stage['rows']:,}", f"{stage['p50']:.3f}s", f"{stage['p95']:.3f}s",
+             f"{stage['rowsPerSec']:,.0f}", stage["peakRssMB"])
+            for name, stage in report["stages"].items()
+        ]
+    )
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        print(f"\nCompared with {args.compare}:")
+        printTable(["Stage", "Before p50", "After p50", "Change"], compareResults(previous, report))
+
+
+if __name__ == "__main__":
+    main()
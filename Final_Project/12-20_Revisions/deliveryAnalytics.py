@@ -0,0 +1,271 @@
+# Blue Group -  CSD-310
+# Supplier lateness analytics: rolling on-time rates, lateness percentiles and trend.
+
+# For each supplier, over the deliveries that arrived in the --days before the as-of date:
+#   On Time 30d / 90d  share of the deliveries in the last 30 / 90 days that were early or on time
+#   p50 / p90 / p99    days late (negative is early), nearest-rank percentiles
+#   Trend              average days late in the last 30 days minus days 31-90 (negative is improving)
+# MySQL 8 / MariaDB 10.2+ compute all of it in one pass with CUME_DIST(). Older servers fall back to a
+# GROUP BY that returns one row per supplier per distinct days-late value - a histogram, exact because
+# DATEDIFF is a whole number of days - and the percentiles are read from it in Python. Either way only
+# the summary (or the much smaller histogram) leaves the server, never the deliveries themselves.
+
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+from mysql.connector import Error, errorcode
+
+from bacchusDB import get_connection
+from queryTrace import executeQuery, tracedCursor
+from tableFormat import printTable
+
+METHODS = ["auto", "window", "histogram"]
+DEFAULT_DAYS = 365
+PERCENTILES = [50, 90, 99]
+
+LATENESS_HEADERS = [
+    "SupplierID", "Name", "Deliveries", "On Time 30d %", "On Time 90d %",
+    "p50 Days", "p90 Days", "p99 Days", "Trend",
+]
+
+# Params: (window start, as of, 30 days back, 90 days back, 30 days back, 90 days back, 30 days back)
+LATENESS_WINDOW_QUERY = """
+    WITH measured AS (
+        SELECT
+            sd.SupplierID,
+            sd.ActualDelivery,
+            DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery) AS DaysLate
+        FROM SupplierDelivery AS sd
+        WHERE sd.ExpectedDelivery IS NOT NULL
+          AND sd.ActualDelivery > %s
+          AND sd.ActualDelivery <= %s
+    ),
+    ranked AS (
+        SELECT
+            m.*,
+            CUME_DIST() OVER (PARTITION BY m.SupplierID ORDER BY m.DaysLate) AS CumeDist
+        FROM measured AS m
+    )
+    SELECT
+        s.SupplierID,
+        s.Name,
+        COUNT(*) AS Deliveries,
+        ROUND(100 * AVG(CASE WHEN r.ActualDelivery > %s THEN r.DaysLate <= 0 END), 1) AS OnTime30,
+        ROUND(100 * AVG(CASE WHEN r.ActualDelivery > %s THEN r.DaysLate <= 0 END), 1) AS OnTime90,
+        MIN(CASE WHEN r.CumeDist >= 0.50 THEN r.DaysLate END) AS P50,
+        MIN(CASE WHEN r.CumeDist >= 0.90 THEN r.DaysLate END) AS P90,
+        MIN(CASE WHEN r.CumeDist >= 0.99 THEN r.DaysLate END) AS P99,
+        ROUND(
+            AVG(CASE WHEN r.ActualDelivery > %s THEN r.DaysLate END)
+            - AVG(CASE WHEN r.ActualDelivery > %s AND r.ActualDelivery <= %s THEN r.DaysLate END),
+            2
+        ) AS Trend
+    FROM ranked AS r
+    JOIN Supplier AS s
+        ON s.SupplierID = r.SupplierID
+    GROUP BY s.SupplierID, s.Name
+    ORDER BY P90 DESC, s.Name;
+"""
+
+# Params: (30 days back, 90 days back, window start, as of)
+LATENESS_HISTOGRAM_QUERY = """
+    SELECT
+        s.SupplierID,
+        s.Name,
+        DATEDIFF(sd.ActualDelivery, sd.ExpectedDelivery) AS DaysLate,
+        COUNT(*) AS Deliveries,
+        SUM(sd.ActualDelivery > %s) AS Last30,
+        SUM(sd.ActualDelivery > %s) AS Last90
+    FROM SupplierDelivery AS sd
+    JOIN Supplier AS s
+        ON s.SupplierID = sd.SupplierID
+    WHERE sd.ExpectedDelivery IS NOT NULL
+      AND sd.ActualDelivery > %s
+      AND sd.ActualDelivery <= %s
+    GROUP BY s.SupplierID, s.Name, DaysLate
+    ORDER BY s.SupplierID, DaysLate;
+"""
+
+LATEST_DELIVERY_QUERY = "SELECT MAX(ActualDelivery) FROM SupplierDelivery;"
+
+
+class LatenessHistogram:
+    # Delivery counts by whole days late. Exact, and two histograms merge by adding their counts.
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, daysLate, count=1):
+        if count:
+            self.counts[daysLate] = self.counts.get(daysLate, 0) + count
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def percentile(self, pct):
+        # Nearest rank, the same value CUME_DIST() >= pct / 100 picks.
+        total = self.total()
+        if not total:
+            return None
+        seen = 0
+        for daysLate in sorted(self.counts):
+            seen += self.counts[daysLate]
+            if seen * 100 >= total * pct:
+                return daysLate
+
+    def mean(self):
+        total = self.total()
+        if not total:
+            return None
+        return Decimal(sum(daysLate * count for daysLate, count in self.counts.items())) / total
+
+    def onTimeRate(self):
+        # Percent of deliveries that were early or on time.
+        total = self.total()
+        if not total:
+            return None
+        onTime = sum(count for daysLate, count in self.counts.items() if daysLate <= 0)
+        return round(Decimal(100 * onTime) / total, 1)
+
+
+def windowDates(asOf, days):
+    return {
+        "start": asOf - timedelta(days=days),
+        "last30": asOf - timedelta(days=30),
+        "last90": asOf - timedelta(days=90),
+    }
+
+
+def windowParams(asOf, days):
+    dates = windowDates(asOf, days)
+    return (
+        dates["start"], asOf,
+        dates["last30"], dates["last90"],
+        dates["last30"], dates["last90"], dates["last30"],
+    )
+
+
+def histogramParams(asOf, days):
+    dates = windowDates(asOf, days)
+    return (dates["last30"], dates["last90"], dates["start"], asOf)
+
+
+def latenessFromHistogram(histogramRows):
+    # Turns LATENESS_HISTOGRAM_QUERY rows into the same rows LATENESS_WINDOW_QUERY returns.
+    suppliers = {}
+    for supplierID, name, daysLate, deliveries, last30, last90 in histogramRows:
+        if supplierID not in suppliers:
+            suppliers[supplierID] = (name, LatenessHistogram(), LatenessHistogram(), LatenessHistogram(), LatenessHistogram())
+        _, window, recent, quarter, earlier = suppliers[supplierID]
+        window.add(daysLate, int(deliveries))
+        recent.add(daysLate, int(last30))
+        quarter.add(daysLate, int(last90))
+        earlier.add(daysLate, int(last90) - int(last30))
+
+    rows = []
+    for supplierID, (name, window, recent, quarter, earlier) in suppliers.items():
+        trend = None
+        if recent.total() and earlier.total():
+            trend = round(recent.mean() - earlier.mean(), 2)
+        rows.append((
+            supplierID, name, window.total(),
+            recent.onTimeRate(), quarter.onTimeRate(),
+            *[window.percentile(pct) for pct in PERCENTILES],
+            trend,
+        ))
+
+    # Same order as the window query: worst p90 first (no p90 sorts last, as NULL does in DESC).
+    rows.sort(key=lambda row: (row[6] is None, -(row[6] or 0), row[1]))
+    return rows
+
+
+def fetchLatenessWindow(conn, asOf, days):
+    cursor = tracedCursor(conn)
+    try:
+        executeQuery(cursor, LATENESS_WINDOW_QUERY, "Supplier lateness (window)", windowParams(asOf, days))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def fetchLatenessHistogram(conn, asOf, days):
+    # Same rows as fetchLatenessWindow, built from the per-supplier lateness histograms.
+    cursor = tracedCursor(conn)
+    try:
+        executeQuery(cursor, LATENESS_HISTOGRAM_QUERY, "Supplier lateness (histogram)", histogramParams(asOf, days))
+        return latenessFromHistogram(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def latestDelivery(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LATEST_DELIVERY_QUERY)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def fetchSupplierLateness(conn, asOf=None, days=DEFAULT_DAYS, method="auto"):
+    # Returns (headers, rows). asOf defaults to the latest ActualDelivery.
+    # method="auto" uses window functions and falls back to the histogram if the server can't parse them.
+    if asOf is None:
+        asOf = latestDelivery(conn)
+        if asOf is None:
+            return LATENESS_HEADERS, []
+
+    if method == "histogram":
+        return LATENESS_HEADERS, fetchLatenessHistogram(conn, asOf, days)
+
+    try:
+        return LATENESS_HEADERS, fetchLatenessWindow(conn, asOf, days)
+    except Error as e:
+        if method == "window" or e.errno != errorcode.ER_PARSE_ERROR:
+            raise
+        return LATENESS_HEADERS, fetchLatenessHistogram(conn, asOf, days) # No CTEs / window functions here.
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Supplier lateness: rolling on-time rates, percentiles and trend.")
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        default=None,
+        help="end of the reporting window, YYYY-MM-DD (default: the latest ActualDelivery)"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=DEFAULT_DAYS,
+        help=f"deliveries from this many days before the as-of date feed the percentiles (default: {DEFAULT_DAYS})"
+    )
+    parser.add_argument(
+        "--method",
+        choices=METHODS,
+        default="auto",
+        help="window uses MySQL 8 window functions, histogram works on any server (default: auto)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    try:
+        with get_connection() as conn:
+            headers, rows = fetchSupplierLateness(conn, args.as_of, args.days, args.method)
+
+    except Error as e:
+        print("Error:", e)
+        return
+
+    print("=" * 70)
+    print("Supplier Lateness - Rolling On-Time Rate, Percentiles and Trend")
+    print("=" * 70)
+    printTable(headers, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Blue Group -  CSD-310
+# Fiscal period engine for the hours report.
+
+# Builds week/month/quarter periods from any fiscal year start, and one bind-parameterized
+# query that totals Hours for every period in a single pass: each punch is matched to its
+# period through a small derived table of period boundaries, then grouped by employee and
+# period. Averages are per week, using each period's real length in days / 7.
+# The query can read the raw Hours punches or the HoursDaily rollup (see rollups.py).
+
+import calendar
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+GRANULARITIES = ["week", "month", "quarter"]
+MONTHS_PER_PERIOD = {"month": 1, "quarter": 3}
+
+# source: (table, date column, hours column)
+SOURCES = {
+    "hours": ("Hours", "StartShift", "HoursWorked"),
+    "daily": ("HoursDaily", "WorkDate", "TotalHours"),
+}
+
+Period = namedtuple("Period", ["label", "start", "end"]) # start <= StartShift < end
+
+
+def addMonths(startDate, months):
+    # Same day of the month, `months` later, clamped to the end of shorter months.
+    year, month = divmod(startDate.month - 1 + months, 12)
+    year += startDate.year
+    month += 1
+    day = min(startDate.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def buildPeriods(fiscalStart, granularity="quarter", count=4):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if count < 1:
+        raise ValueError("count must be at least 1") # The query and headers need a first and last period.
+
+    periods = []
+    for n in range(count):
+        if granularity == "week":
+            start = fiscalStart + timedelta(weeks=n)
+            end = start + timedelta(weeks=1)
+            label = f"W{n + 1}"
+        else:
+            months = MONTHS_PER_PERIOD[granularity]
+            start = addMonths(fiscalStart, n * months)
+            end = addMonths(fiscalStart, (n + 1) * months)
+            label = f"Q{n + 1}" if granularity == "quarter" else f"{start:%b %Y}"
+        periods.append(Period(label, start, end))
+    return periods
+
+
+def periodWeeks(period):
+    return Decimal((period.end - period.start).days) / 7
+
+
+def buildHoursQuery(periods, source="hours"):
+    # Returns (query, params). The query text only depends on how many periods there are
+    # (and the source), so the same prepared statement is reused for any fiscal year of the same shape.
+    table, dateColumn, hoursColumn = SOURCES[source]
+
+    boundaries = "\n        UNION ALL ".join(
+        f"SELECT {n} AS PeriodNo, CAST(%s AS DATETIME) AS PeriodStart, CAST(%s AS DATETIME) AS PeriodEnd"
+        for n in range(len(periods))
+    )
+
+    query = f"""
+    SELECT
+        e.EmployeeID,
+        d.Name,
+        e.FirstName,
+        e.LastName,
+        p.PeriodNo,
+        SUM(h.{hoursColumn}) AS TotalHours
+    FROM {table} AS h
+    INNER JOIN (
+        {boundaries}
+    ) AS p
+        ON h.{dateColumn} >= p.PeriodStart
+       AND h.{dateColumn} < p.PeriodEnd
+    INNER JOIN Employee AS e
+        ON e.EmployeeID = h.EmployeeID
+    INNER JOIN Department AS d
+        ON e.DeptID = d.DeptID
+    WHERE h.{dateColumn} >= %s
+      AND h.{dateColumn} < %s
+    GROUP BY e.EmployeeID, d.Name, e.FirstName, e.LastName, p.PeriodNo
+    ORDER BY d.Name, e.LastName, e.FirstName, e.EmployeeID, p.PeriodNo;
+    """
+
+    params = [value for period in periods for value in (period.start, period.end)]
+    params += [periods[0].start, periods[-1].end]
+
+    return query, params
+
+
+def pivotHours(rows, periods):
+    # Turns (EmployeeID, Dept, First, Last, PeriodNo, TotalHours) rows into one row per employee:
+    # (EmployeeID, Dept, First, Last, avg per week for each period..., avg per week overall).
+    # Periods without punches are None, like the SUM(CASE ...) columns they replace.
+    totalWeeks = sum(periodWeeks(period) for period in periods)
+
+    pivoted = []
+    current = None
+    for empID, dept, first, last, periodNo, totalHours in rows:
+        if current is None or current[0] != empID:
+            current = [empID, dept, first, last, [None] * len(periods)]
+            pivoted.append(current)
+        current[4][periodNo] = totalHours
+
+    results = []
+    for empID, dept, first, last, totals in pivoted:
+        averages = [
+            None if total is None else round(total / periodWeeks(period), 2)
+            for total, period in zip(totals, periods)
+        ]
+        overall = round(sum(total for total in totals if total is not None) / totalWeeks, 2)
+        results.append((empID, dept, first, last, *averages, overall))
+    return results
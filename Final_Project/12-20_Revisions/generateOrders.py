@@ -0,0 +1,431 @@
+# Blue Group -  CSD-310
+# Synthetic distributor orders and supplier deliveries, modeled on Breutzmann-GenerateHours.py.
+
+# Orders are placed day by day with a seasonal curve (holiday peak, summer bump, quiet weekends),
+# by distributors with a long-tailed order frequency, for wines weighted toward recent vintages.
+# Most orders ship a few days later; recent ones may not have shipped yet. Supplier deliveries
+# follow a lateness profile per supplier. Rows get explicit IDs and are streamed in chunks, each
+# chunk inserting parents before children, so referential integrity holds at every commit.
+
+import argparse
+import os
+import random
+import tempfile
+import time as timer
+from datetime import date, timedelta
+
+from mysql.connector import Error
+
+from bacchusDB import get_connection
+from loadHelpers import LOCAL_INFILE_DISABLED, chunkRows, deriveSeed, generateDateRange
+from rollups import rebuildSupplierDeliveryStats, rebuildWineSalesSummary, refreshWineSalesSummary
+
+# table: (primary key, columns in insert order). Parents come before their children.
+ORDER_TABLES = {
+    "Shipment": ("ShipmentID", ["ShipmentID", "ShipmentDate", "TrackingNumber", "ShipperID"]),
+    "DistOrder": ("OrderID", ["OrderID", "DistID", "ShipmentID", "OrderDate"]),
+    "DistItemOrder": ("OrderItemID", ["OrderItemID", "OrderID", "WineID", "Quantity"]),
+}
+DELIVERY_TABLES = {
+    "SupplierDelivery": ("InvoiceID", ["InvoiceID", "SupplierID", "ExpectedDelivery", "ActualDelivery"]),
+    "SupplierItemDelivery": ("OrderItemID", ["OrderItemID", "InvoiceID", "SupplyItemID", "Quantity"]),
+}
+
+# Relative order volume by month: holiday peak, a summer bump, and a slow January.
+MONTH_WEIGHTS = {1: 0.6, 2: 0.7, 3: 0.8, 4: 0.9, 5: 1.0, 6: 1.2, 7: 1.3, 8: 1.1, 9: 1.0, 10: 1.2, 11: 1.6, 12: 1.9}
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 1.1, 0.3, 0.1] # Monday .. Sunday
+
+LINE_WEIGHTS = [35, 25, 18, 12, 6, 4] # chance of an order having 1 .. 6 wines
+UNSHIPPED_RATE = 0.02 # orders that never ship (cancelled, on hold)
+
+# SupplierID: (chance early, chance on time, mean days late when late)
+# Matches the seed data: Dionysus is reliable, Hermes tends to be early, Vulcan runs weeks behind.
+LATENESS_PROFILES = {
+    1: (0.10, 0.70, 2),
+    2: (0.40, 0.45, 2),
+    3: (0.15, 0.25, 9),
+}
+DEFAULT_LATENESS = (0.15, 0.60, 3)
+
+LOADERS = ["executemany", "multirow", "infile"]
+
+
+def dailyCounts(rng, total, startDate, endDate, seasonal=True):
+    # Yields (date, count) for each day so the counts add up to about `total`, following the seasonal curve.
+    days = list(generateDateRange(startDate, endDate))
+    if seasonal:
+        weights = [MONTH_WEIGHTS[d.month] * WEEKDAY_WEIGHTS[d.weekday()] for d in days]
+    else:
+        weights = [1.0] * len(days)
+    scale = total / sum(weights)
+
+    for d, weight in zip(days, weights):
+        expected = weight * scale
+        count = int(expected)
+        if rng.random() < expected - count:
+            count += 1
+        yield d, count
+
+
+def longTailWeights(rng, ids, exponent=0.8):
+    # Zipf-like weights in a random order: a few ids get most of the volume.
+    ranks = list(range(1, len(ids) + 1))
+    rng.shuffle(ranks)
+    return [1 / rank ** exponent for rank in ranks]
+
+
+def vintageWeights(wines):
+    # {year: (wineIDs, weights)} of the wines produced by that year, favouring recent vintages.
+    # Covers the oldest through the newest vintage; callers clamp other years into that range.
+    years = [year for _, year in wines]
+    choices = {}
+    for year in range(min(years), max(years) + 1):
+        available = [(wineID, produced) for wineID, produced in wines if produced <= year]
+        choices[year] = (
+            [wineID for wineID, _ in available],
+            [1 / (1 + year - produced) for _, produced in available]
+        )
+    return choices
+
+
+def generateOrderBundles(rng, count, startDate, endDate, nextIDs, distributorIDs, wines, shipperIDs):
+    # Yields (shipment row or None, order row, [item rows]) in order date order.
+    distWeights = longTailWeights(rng, distributorIDs)
+    byYear = vintageWeights(wines)
+    oldest, newest = min(byYear), max(byYear)
+
+    shipmentID = nextIDs["Shipment"]
+    orderID = nextIDs["DistOrder"]
+    itemID = nextIDs["DistItemOrder"]
+
+    for orderDate, todays in dailyCounts(rng, count, startDate, endDate):
+        wineIDs, wineWeights = byYear[min(max(orderDate.year, oldest), newest)]
+
+        for _ in range(todays):
+            shipment = None
+            shipDate = orderDate + timedelta(days=round(rng.triangular(1, 6, 2)))
+            if shipDate <= endDate and rng.random() >= UNSHIPPED_RATE:
+                shipment = (shipmentID, shipDate, f"TRACK-{shipmentID}", rng.choice(shipperIDs))
+                shipmentID += 1
+
+            distID = rng.choices(distributorIDs, distWeights)[0]
+            order = (orderID, distID, shipment[0] if shipment else None, orderDate)
+
+            lines = rng.choices(range(1, len(LINE_WEIGHTS) + 1), LINE_WEIGHTS)[0]
+            picked = set(rng.choices(wineIDs, wineWeights, k=lines)) # Duplicates collapse into one line.
+            items = []
+            for wineID in sorted(picked):
+                cases = max(1, round(rng.lognormvariate(1.0, 0.6)))
+                items.append((itemID, orderID, wineID, cases * 12))
+                itemID += 1
+
+            yield shipment, order, items
+            orderID += 1
+
+
+def deliveryDelay(rng, supplierID):
+    early, onTime, meanLate = LATENESS_PROFILES.get(supplierID, DEFAULT_LATENESS)
+    roll = rng.random()
+    if roll < early:
+        return -rng.randint(1, 3)
+    if roll < early + onTime:
+        return 0
+    return 1 + int(rng.expovariate(1 / meanLate))
+
+
+def generateDeliveryBundles(rng, count, startDate, endDate, nextIDs, supplierItems):
+    # Yields (delivery row, [item rows]). Deliveries that would arrive after endDate have no ActualDelivery yet.
+    supplierIDs = sorted(supplierItems)
+    supplierWeights = [len(supplierItems[supplierID]) for supplierID in supplierIDs] # Busier suppliers sell more items.
+
+    invoiceID = nextIDs["SupplierDelivery"]
+    itemID = nextIDs["SupplierItemDelivery"]
+
+    for expected, todays in dailyCounts(rng, count, startDate, endDate, seasonal=False):
+        for _ in range(todays):
+            supplierID = rng.choices(supplierIDs, supplierWeights)[0]
+            actual = expected + timedelta(days=deliveryDelay(rng, supplierID))
+            delivery = (invoiceID, supplierID, expected, actual if actual <= endDate else None)
+
+            items = []
+            available = supplierItems[supplierID]
+            for supplyItemID in sorted(rng.sample(available, rng.randint(1, len(available)))):
+                items.append((itemID, invoiceID, supplyItemID, 100 * rng.randint(1, 20)))
+                itemID += 1
+
+            yield delivery, items
+            invoiceID += 1
+
+
+def splitBundles(chunk, tables):
+    # Turns a chunk of bundles into {table: rows}, in the tables' parent-first order.
+    rows = {table: [] for table in tables}
+    names = list(tables)
+    for bundle in chunk:
+        *parents, items = bundle
+        for table, row in zip(names, parents):
+            if row is not None:
+                rows[table].append(row)
+        rows[names[-1]].extend(items)
+    return rows
+
+
+def insertSQL(table, tables, rowCount=1):
+    columns = tables[table][1]
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([placeholders] * rowCount)
+
+
+def insertRows(cur, table, tables, rows, multiRow):
+    if not rows:
+        return
+    if multiRow:
+        cur.execute(insertSQL(table, tables, len(rows)), [value for row in rows for value in row])
+    else:
+        cur.executemany(insertSQL(table, tables), rows)
+
+
+def loadBundles(conn, cur, bundles, tables, chunkSize, commitEvery, multiRow):
+    # Inserts chunkSize bundles at a time, parents first, committing about every commitEvery bundles.
+    # Returns {table: rows inserted}.
+    inserted = {table: 0 for table in tables}
+    sinceCommit = 0
+    for chunk in chunkRows(bundles, chunkSize):
+        for table, rows in splitBundles(chunk, tables).items():
+            insertRows(cur, table, tables, rows, multiRow)
+            inserted[table] += len(rows)
+
+        sinceCommit += len(chunk)
+        if sinceCommit >= commitEvery:
+            conn.commit()
+            sinceCommit = 0
+
+    conn.commit()
+    return inserted
+
+
+def formatTSVRow(row):
+    return "\t".join("\\N" if value is None else str(value) for value in row) + "\n"
+
+
+def parseTSVRow(line):
+    return tuple(None if value == "\\N" else value for value in line.rstrip("\n").split("\t"))
+
+
+def loadBundlesInfile(conn, cur, bundles, tables, chunkSize, commitEvery):
+    # Streams every table to its own temporary TSV file, then LOAD DATA LOCAL INFILEs them parent first.
+    # Falls back to chunked multi-row INSERTs from the same files when local infile is disabled.
+    handles = {
+        table: tempfile.NamedTemporaryFile("w", suffix=f"_{table}.tsv", delete=False, newline="")
+        for table in tables
+    }
+    try:
+        counts = {table: 0 for table in tables}
+        for chunk in chunkRows(bundles, chunkSize):
+            for table, rows in splitBundles(chunk, tables).items():
+                handles[table].writelines(formatTSVRow(row) for row in rows)
+                counts[table] += len(rows)
+        for handle in handles.values():
+            handle.close()
+
+        try:
+            for table, handle in handles.items():
+                cur.execute(
+                    f"""
+                    LOAD DATA LOCAL INFILE %s
+                    INTO TABLE {table}
+                    FIELDS TERMINATED BY '\\t'
+                    LINES TERMINATED BY '\\n'
+                    ({', '.join(tables[table][1])})
+                    """,
+                    (handle.name,)
+                )
+            conn.commit()
+            return counts
+
+        except Error as e:
+            if e.errno not in LOCAL_INFILE_DISABLED:
+                raise
+            conn.rollback()
+            print("LOAD DATA LOCAL INFILE is disabled, falling back to multi-row INSERTs.")
+
+        for table, handle in handles.items():
+            with open(handle.name, newline="") as tsv:
+                for chunk in chunkRows((parseTSVRow(line) for line in tsv), chunkSize):
+                    insertRows(cur, table, tables, chunk, multiRow=True)
+            conn.commit()
+        return counts
+
+    finally:
+        for handle in handles.values():
+            handle.close()
+            os.remove(handle.name)
+
+
+def loadTables(conn, cur, bundles, tables, args):
+    if args.loader == "infile":
+        return loadBundlesInfile(conn, cur, bundles, tables, args.chunk_size, args.commit_every)
+    return loadBundles(conn, cur, bundles, tables, args.chunk_size, args.commit_every, multiRow=(args.loader == "multirow"))
+
+
+def fetchNextIDs(cur, tables):
+    # The first free primary key of each table, so generated children can point at generated parents.
+    nextIDs = {}
+    for table, (key, columns) in tables.items():
+        cur.execute(f"SELECT COALESCE(MAX({key}), 0) + 1 FROM {table};")
+        nextIDs[table] = cur.fetchone()[0]
+    return nextIDs
+
+
+def fetchLookups(cur):
+    # Returns (distributorIDs, [(WineID, YearProduced)], shipperIDs, {SupplierID: [SupplyItemID]}).
+    cur.execute("SELECT DistID FROM Distributor ORDER BY DistID;")
+    distributorIDs = [distID for (distID,) in cur.fetchall()]
+
+    cur.execute("SELECT WineID, YearProduced FROM Wine ORDER BY WineID;")
+    wines = [(wineID, int(year)) for wineID, year in cur.fetchall()]
+
+    cur.execute("SELECT ShipperID FROM ShipService ORDER BY ShipperID;")
+    shipperIDs = [shipperID for (shipperID,) in cur.fetchall()]
+
+    cur.execute("SELECT SupplierID, SupplyItemID FROM SupplyItem WHERE SupplierID IS NOT NULL ORDER BY SupplyItemID;")
+    supplierItems = {}
+    for supplierID, supplyItemID in cur.fetchall():
+        supplierItems.setdefault(supplierID, []).append(supplyItemID)
+
+    return distributorIDs, wines, shipperIDs, supplierItems
+
+
+def clearTables(cur):
+    # Children first; foreign key checks are off because TRUNCATE refuses referenced tables.
+    # WineSalesSummary and the delivery stats are rebuilt once the new rows are loaded.
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0;")
+    try:
+        for table in [*reversed(ORDER_TABLES), *reversed(DELIVERY_TABLES)]:
+            cur.execute(f"TRUNCATE TABLE {table};")
+    finally:
+        cur.execute("SET FOREIGN_KEY_CHECKS = 1;")
+
+
+def generateOrders(conn, cur, args):
+    # Generates and loads args.orders orders and args.deliveries deliveries. Returns {table: rows inserted}.
+    distributorIDs, wines, shipperIDs, supplierItems = fetchLookups(cur)
+    if not (distributorIDs and wines and shipperIDs and supplierItems):
+        raise ValueError("Distributor, Wine, ShipService and SupplyItem need rows before orders can be generated.")
+
+    if args.replace:
+        clearTables(cur)
+
+    inserted = {}
+    rng = random.Random(deriveSeed(args.seed, "orders"))
+    orders = generateOrderBundles(
+        rng, args.orders, args.start, args.end, fetchNextIDs(cur, ORDER_TABLES),
+        distributorIDs, wines, shipperIDs
+    )
+    inserted.update(loadTables(conn, cur, orders, ORDER_TABLES, args))
+
+    rng = random.Random(deriveSeed(args.seed, "deliveries"))
+    deliveries = generateDeliveryBundles(
+        rng, args.deliveries, args.start, args.end, fetchNextIDs(cur, DELIVERY_TABLES), supplierItems
+    )
+    inserted.update(loadTables(conn, cur, deliveries, DELIVERY_TABLES, args))
+
+    # The emptied tables would leave the summary's high-water mark pointing past every new line item,
+    # and TRUNCATE doesn't fire the triggers that keep the delivery stats current.
+    if args.replace:
+        rebuildWineSalesSummary(conn)
+        rebuildSupplierDeliveryStats(conn)
+    else:
+        refreshWineSalesSummary(conn)
+
+    return inserted
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Generate distributor orders and supplier deliveries.")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=date(2024, 12, 1),
+        help="first order/delivery date, YYYY-MM-DD (default: 2024-12-01)"
+    )
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=date(2025, 11, 30),
+        help="last order/delivery date, YYYY-MM-DD (default: 2025-11-30)"
+    )
+    parser.add_argument(
+        "--orders",
+        type=int,
+        default=100000,
+        help="distributor orders to generate, about (default: 100,000)"
+    )
+    parser.add_argument(
+        "--deliveries",
+        type=int,
+        default=10000,
+        help="supplier deliveries to generate, about (default: 10,000)"
+    )
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="empty the order, shipment and delivery tables first instead of adding to them"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="random seed so the same orders can be generated again"
+    )
+    parser.add_argument(
+        "--loader",
+        choices=LOADERS,
+        default="multirow",
+        help="how rows are sent to MySQL; infile streams to temp files and uses LOAD DATA LOCAL INFILE (default: multirow)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="orders or deliveries generated and sent to MySQL per chunk (default: 2000)"
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=20000,
+        help="commit after about this many orders or deliveries (default: 20000)"
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parseArgs()
+
+    try:
+        with get_connection(allowLocalInfile=(args.loader == "infile")) as conn:
+            cur = conn.cursor()
+            try:
+                started = timer.perf_counter()
+                inserted = generateOrders(conn, cur, args)
+                elapsed = timer.perf_counter() - started
+
+            except Error:
+                conn.rollback()
+                raise
+
+            finally:
+                cur.close()
+
+        total = sum(inserted.values())
+        print("Orders and deliveries generated successfully.")
+        for table, count in inserted.items():
+            print(f"  {table}: {count:,} rows")
+        print(f"{total:,} rows loaded in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+    except (Error, ValueError) as e:
+        print("Error:", e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Blue Group -  CSD-310
+# Helpers shared by the data generators (Breutzmann-GenerateHours.py and generateOrders.py).
+
+# Date ranges, chunking rows for the loaders, per-partition seeds, and the error numbers that mean
+# LOAD DATA LOCAL INFILE is turned off. Kept apart from either generator so neither has to import
+# the other (and its NumPy and rollup dependencies) to reuse them.
+
+import hashlib
+from datetime import timedelta
+
+from mysql.connector import errorcode
+
+# Server/client error numbers meaning LOAD DATA LOCAL INFILE is turned off, so we fall back to INSERTs.
+LOCAL_INFILE_DISABLED = {
+    errorcode.ER_NOT_ALLOWED_COMMAND,
+    errorcode.ER_CLIENT_LOCAL_FILES_DISABLED,
+    errorcode.CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+}
+
+
+def generateDateRange(startDate, endDate):
+    # Yields each date from startDate through endDate, one at a time.
+    current = startDate
+    while current <= endDate:
+        yield current
+        current += timedelta(days=1)
+
+
+def chunkRows(rows, chunkSize):
+    # Yields lists of at most chunkSize rows from any iterable of rows.
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunkSize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def deriveSeed(seed, partIndex):
+    # Gives each worker its own seed that only depends on the run's seed and the worker's partition.
+    if seed is None:
+        return None
+    digest = hashlib.sha256(f"{seed}:{partIndex}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
@@ -0,0 +1,193 @@
+# Blue Group -  CSD-310
+# Query timing and EXPLAIN tracing for the Bacchus reports.
+
+# Turned on with environment variables, so production runs can trace a slow report without code changes:
+#   BACCHUS_TRACE=summary          print a timing table to stderr when the script exits
+#   BACCHUS_TRACE=log              print one JSON line per query to stderr as it finishes
+#   BACCHUS_TRACE_EXPLAIN=json     also capture EXPLAIN FORMAT=JSON for each query
+#   BACCHUS_TRACE_EXPLAIN=analyze  also capture EXPLAIN ANALYZE (runs the query a second time)
+# When BACCHUS_TRACE is unset, tracedCursor hands back the plain cursor and nothing is timed.
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from mysql.connector import Error
+
+from bacchusDB import warningsAllowed
+from tableFormat import printTable
+
+TRACE_ENV = "BACCHUS_TRACE"
+EXPLAIN_ENV = "BACCHUS_TRACE_EXPLAIN"
+
+TRACE_MODES = ["summary", "log"]
+EXPLAIN_STATEMENTS = {"json": "EXPLAIN FORMAT=JSON", "analyze": "EXPLAIN ANALYZE"}
+
+TRACE_MODE = os.environ.get(TRACE_ENV, "").strip().lower() or None
+if TRACE_MODE in ("1", "true", "yes", "on"):
+    TRACE_MODE = "summary"
+elif TRACE_MODE in ("0", "false", "no", "off"):
+    TRACE_MODE = None
+elif TRACE_MODE is not None and TRACE_MODE not in TRACE_MODES:
+    print(f"Unknown {TRACE_ENV}={TRACE_MODE!r}, using summary.", file=sys.stderr)
+    TRACE_MODE = "summary"
+
+EXPLAIN_MODE = os.environ.get(EXPLAIN_ENV, "").strip().lower() or None
+if EXPLAIN_MODE is not None and EXPLAIN_MODE not in EXPLAIN_STATEMENTS:
+    print(f"Unknown {EXPLAIN_ENV}={EXPLAIN_MODE!r}, not capturing EXPLAIN.", file=sys.stderr)
+    EXPLAIN_MODE = None
+
+_records = []
+_recordsLock = threading.Lock() # The report runner traces several reports at once.
+_summaryRegistered = False
+
+
+def valueBytes(value):
+    # Approximate size of one value on the wire: its length as bytes or text.
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return len(str(value))
+
+
+def explainQuery(conn, query, params=None):
+    # Returns the EXPLAIN output as text, or the error if the server can't explain the query.
+    with warningsAllowed(conn): # MySQL 8 adds Note 1003 to every EXPLAIN.
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"{EXPLAIN_STATEMENTS[EXPLAIN_MODE]} {query.strip()}", params)
+            return "\n".join(str(row[0]) for row in cursor.fetchall())
+        except Error as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            cursor.close()
+
+
+def addRecord(record):
+    global _summaryRegistered
+
+    if TRACE_MODE == "log":
+        print(json.dumps(record, default=str), file=sys.stderr)
+
+    with _recordsLock:
+        _records.append(record)
+        if TRACE_MODE == "summary" and not _summaryRegistered:
+            atexit.register(printTraceSummary)
+            _summaryRegistered = True
+
+
+def traceRecords():
+    with _recordsLock:
+        return list(_records)
+
+
+def printTraceSummary(file=None):
+    # One row per traced query, then any EXPLAIN output that was captured.
+    file = file or sys.stderr
+    records = traceRecords()
+    if not records:
+        return
+
+    print("\n" + "=" * 70, file=file)
+    print("Query Trace", file=file)
+    print("-" * 70, file=file)
+    printTable(
+        ["Query", "Execute", "Fetch", "Rows", "Bytes"],
+        [
+            (record["label"], f"{record['executeSeconds']:.3f}s", f"{record['fetchSeconds']:.3f}s",
+             f"{record['rows']:,}", f"{record['bytes']:,}")
+            for record in records
+        ],
+        file=file
+    )
+
+    for record in records:
+        if record.get("explain"):
+            print(f"\n-- {record['label']}", file=file)
+            print(record["explain"], file=file)
+
+
+class TracedCursor:
+    # Wraps a mysql.connector cursor and times execute and every fetch. Anything else
+    # (description, rowcount, ...) is passed straight through to the real cursor.
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+        self._record = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, query, params=None, label=None):
+        self._finish()
+
+        record = {
+            "label": label or query.strip().splitlines()[0],
+            "executeSeconds": 0.0,
+            "fetchSeconds": 0.0,
+            "rows": 0,
+            "bytes": 0,
+        }
+        if EXPLAIN_MODE:
+            record["explain"] = explainQuery(self._conn, query, params) # Before the real query leaves unread rows.
+
+        started = time.perf_counter()
+        self._cursor.execute(query, params)
+        record["executeSeconds"] = time.perf_counter() - started
+        self._record = record
+
+    def _recordFetch(self, started, rows):
+        if self._record is None:
+            return
+        self._record["fetchSeconds"] += time.perf_counter() - started
+        for row in rows:
+            self._record["rows"] += 1
+            self._record["bytes"] += sum(valueBytes(value) for value in row)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._recordFetch(started, [] if row is None else [row])
+        return row
+
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._recordFetch(started, rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._recordFetch(started, rows)
+        return rows
+
+    def _finish(self):
+        if self._record is not None:
+            addRecord(self._record)
+            self._record = None
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+
+def tracedCursor(conn, **kwargs):
+    # conn.cursor(**kwargs), wrapped in a TracedCursor when tracing is on.
+    cursor = conn.cursor(**kwargs)
+    if TRACE_MODE is None:
+        return cursor
+    return TracedCursor(conn, cursor)
+
+
+def executeQuery(cursor, query, label, params=None):
+    # Runs a query on a plain or traced cursor; label names it in the trace.
+    if isinstance(cursor, TracedCursor):
+        cursor.execute(query, params, label=label)
+    else:
+        cursor.execute(query, params)
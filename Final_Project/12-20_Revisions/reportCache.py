@@ -0,0 +1,142 @@
+# Blue Group -  CSD-310
+# On-disk and in-memory caches for report results.
+
+# A result is stored under a hash of its query text and parameters, together with a "version"
+# of every table the report reads (information_schema UPDATE_TIME plus the table's highest
+# primary key). A cached result is reused while it is younger than the TTL and none of those
+# tables have changed, so repeated refreshes skip the aggregation entirely.
+# ResultCache keeps the same kind of entry in memory, least recently used first out, for the report service.
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from mysql.connector import Error
+
+CACHE_DIR = ".report_cache"
+DEFAULT_TTL = 300 # seconds
+DEFAULT_CACHE_SIZE = 32 # results kept by ResultCache
+
+
+def cacheKey(query, params=None):
+    return hashlib.sha256((query + "\0" + repr(params)).encode()).hexdigest()
+
+
+def tableVersions(conn, tables):
+    # Returns {table: (UPDATE_TIME, max primary key)} for the given tables.
+    cursor = conn.cursor()
+    try:
+        try:
+            # MySQL 8 caches UPDATE_TIME for a day by default; ask for the live value.
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0;")
+        except Error:
+            pass # MariaDB and MySQL 5.7 don't have the setting (or the cache).
+
+        names = [table.lower() for table in tables]
+        placeholders = ", ".join(["%s"] * len(names))
+
+        cursor.execute(
+            f"""
+            SELECT LOWER(TABLE_NAME), UPDATE_TIME
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND LOWER(TABLE_NAME) IN ({placeholders});
+            """,
+            names
+        )
+        versions = {table: [str(updated)] for table, updated in cursor.fetchall()}
+
+        cursor.execute(
+            f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND CONSTRAINT_NAME = 'PRIMARY'
+              AND LOWER(TABLE_NAME) IN ({placeholders})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION;
+            """,
+            names
+        )
+        keyColumns = {}
+        for table, column in cursor.fetchall():
+            keyColumns.setdefault(table, []).append(f"`{column}`")
+
+        for table, columns in keyColumns.items():
+            # The last primary key, read from the end of the PK index. MAX() of each column would need a
+            # full scan for the later columns of a composite key such as HoursDaily (EmployeeID, WorkDate).
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM `{table}` "
+                f"ORDER BY {', '.join(column + ' DESC' for column in columns)} LIMIT 1;"
+            )
+            versions.setdefault(table.lower(), []).append(str(cursor.fetchone()))
+
+    finally:
+        cursor.close()
+
+    return {table: tuple(version) for table, version in sorted(versions.items())}
+
+
+def cachedResult(conn, query, tables, run, params=None, ttl=DEFAULT_TTL, cacheDir=CACHE_DIR):
+    # Returns run(conn) -> (headers, rows), reusing the cached copy when it is still valid.
+    path = os.path.join(cacheDir, cacheKey(query, params) + ".pickle")
+    versions = tableVersions(conn, tables)
+
+    try:
+        with open(path, "rb") as file:
+            entry = pickle.load(file)
+        if entry["versions"] == versions and time.time() - entry["created"] < ttl:
+            return entry["headers"], entry["rows"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+        pass # Missing or unreadable cache file; just rerun the report.
+
+    headers, rows = run(conn)
+
+    os.makedirs(cacheDir, exist_ok=True)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp, "wb") as file:
+        pickle.dump(
+            {"versions": versions, "created": time.time(), "headers": headers, "rows": rows},
+            file
+        )
+    os.replace(temp, path) # Atomic, so a concurrent reader never sees half a file.
+
+    return headers, rows
+
+
+class ResultCache:
+    # In-memory LRU of report results, safe to share between threads. An entry is
+    # (versions, created, headers, rows) and is only handed back while its table versions
+    # still match and it is younger than the TTL.
+
+    def __init__(self, maxEntries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, versions):
+        # Returns (headers, rows) or None.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cachedVersions, created, headers, rows = entry
+            if cachedVersions != versions or time.time() - created >= self.ttl:
+                del self._entries[key] # Stale; drop it now rather than waiting to be evicted.
+                return None
+            self._entries.move_to_end(key)
+            return headers, rows
+
+    def put(self, key, versions, headers, rows):
+        with self._lock:
+            self._entries[key] = (versions, time.time(), headers, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
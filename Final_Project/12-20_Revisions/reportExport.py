@@ -0,0 +1,220 @@
+# Blue Group -  CSD-310
+# Exports the Bacchus reports to Parquet, Arrow IPC or CSV for downstream tools.
+
+# Query reports are streamed straight from an unbuffered cursor, batchSize rows at a time, into a
+# columnar writer, so a large result is never held in memory or turned into text tables. Column types
+# come from cursor.description: DECIMAL stays decimal, DATE stays a date, DATETIME a timestamp.
+# The hours report is pivoted in Python, so its (small) result is exported from the finished rows.
+# Parquet and Arrow need pyarrow; CSV is written with the csv module and needs nothing extra.
+
+import argparse
+import csv
+import os
+from decimal import Decimal
+from itertools import chain, islice
+
+from mysql.connector import Error
+from mysql.connector.constants import FieldType
+
+from bacchusDB import get_connection
+from queryTrace import executeQuery, tracedCursor
+from reportRunner import REPORTS, SUMMARY_REFRESH
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pyarrow is only needed for the parquet and arrow formats.
+    pa = None
+    pq = None
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+DEFAULT_BATCH_SIZE = 10000
+BINARY_CHARSET = 63 # MySQL's "binary" character set: BLOB/VARBINARY columns
+
+# Reports whose rows are built in Python rather than returned by one query.
+PIVOTED_REPORTS = {"hours", "delivery-lateness"}
+
+INTEGER_TYPES = {
+    FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.INT24,
+    FieldType.LONGLONG, FieldType.YEAR, FieldType.BIT,
+}
+DECIMAL_TYPES = {FieldType.DECIMAL, FieldType.NEWDECIMAL}
+FLOAT_TYPES = {FieldType.FLOAT, FieldType.DOUBLE}
+DATETIME_TYPES = {FieldType.DATETIME, FieldType.TIMESTAMP}
+
+
+def decimalScale(values):
+    # The connector doesn't report a DECIMAL column's scale, but every value from one column has it.
+    for value in values:
+        if isinstance(value, Decimal):
+            return max(0, -value.as_tuple().exponent)
+    return 2
+
+
+def arrowType(desc, sample):
+    # Arrow type for one cursor.description entry; sample is that column's values from the first batch.
+    typeCode = desc[1]
+    charset = desc[8] if len(desc) > 8 else None
+    if typeCode in INTEGER_TYPES:
+        return pa.int64()
+    if typeCode in DECIMAL_TYPES:
+        return pa.decimal128(38, decimalScale(sample))
+    if typeCode in FLOAT_TYPES:
+        return pa.float64()
+    if typeCode == FieldType.DATE:
+        return pa.date32()
+    if typeCode in DATETIME_TYPES:
+        return pa.timestamp("us")
+    if typeCode == FieldType.TIME:
+        return pa.duration("us") # The connector returns TIME as a timedelta.
+    if charset == BINARY_CHARSET:
+        return pa.binary()
+    return pa.string()
+
+
+def inferSchema(headers, firstBatch, description=None):
+    # From cursor.description when there is one, otherwise from the values themselves.
+    columns = list(zip(*firstBatch)) if firstBatch else [()] * len(headers)
+    fields = []
+    for colIDX, header in enumerate(headers):
+        if description is not None:
+            fieldType = arrowType(description[colIDX], columns[colIDX])
+        else:
+            fieldType = pa.array(columns[colIDX]).type
+            if pa.types.is_null(fieldType):
+                fieldType = pa.string()
+            elif pa.types.is_decimal(fieldType):
+                fieldType = pa.decimal128(38, fieldType.scale) # Room for larger values in later batches.
+        fields.append(pa.field(header, fieldType))
+    return pa.schema(fields)
+
+
+def toRecordBatch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def writeBatches(path, fmt, headers, batches, description=None):
+    # Writes an iterable of row lists to path. Returns the number of rows written.
+    if fmt == "csv":
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(headers)
+            count = 0
+            for batch in batches:
+                writer.writerows(batch) # str() of Decimal and date is exact / ISO 8601.
+                count += len(batch)
+        return count
+
+    if pa is None:
+        raise RuntimeError(f"The {fmt} format requires pyarrow to be installed.")
+
+    batches = iter(batches)
+    first = next(batches, [])
+    schema = inferSchema(headers, first, description)
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    count = 0
+    with writer:
+        for batch in chain([first], batches):
+            if batch:
+                writer.write_batch(toRecordBatch(batch, schema))
+                count += len(batch)
+    return count
+
+
+def fetchBatches(cursor, batchSize):
+    while True:
+        batch = cursor.fetchmany(batchSize)
+        if not batch:
+            return
+        yield batch
+
+
+def rowBatches(rows, batchSize):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batchSize))
+        if not batch:
+            return
+        yield batch
+
+
+def exportReport(conn, name, path, fmt, batchSize=DEFAULT_BATCH_SIZE):
+    # Exports one REPORTS entry to path. Returns the number of rows written.
+    title, query, params, tables, report = REPORTS[name]
+
+    if name in PIVOTED_REPORTS:
+        headers, rows = report(conn)
+        return writeBatches(path, fmt, headers, rowBatches(rows, batchSize))
+
+    if name in SUMMARY_REFRESH:
+        SUMMARY_REFRESH[name](conn)
+
+    cursor = tracedCursor(conn) # Unbuffered, so rows arrive batch by batch.
+    try:
+        executeQuery(cursor, query, f"export {name}", params)
+        headers = [desc[0] for desc in cursor.description]
+        return writeBatches(path, fmt, headers, fetchBatches(cursor, batchSize), cursor.description)
+    finally:
+        cursor.close()
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Export the Bacchus reports to Parquet, Arrow IPC or CSV.")
+    parser.add_argument(
+        "reports",
+        nargs="*",
+        help=f"reports to export, any of: {', '.join(REPORTS)} (default: all)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default="parquet",
+        help="file format; parquet and arrow need pyarrow (default: parquet)"
+    )
+    parser.add_argument(
+        "--dir",
+        default="exports",
+        help="folder to write <report>.<format> files to (default: exports)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"rows fetched and written per batch (default: {DEFAULT_BATCH_SIZE:,})"
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(unknown)}")
+
+    return args
+
+
+def main():
+    args = parseArgs()
+    names = args.reports or list(REPORTS)
+
+    os.makedirs(args.dir, exist_ok=True)
+    try:
+        with get_connection() as conn:
+            for name in names:
+                path = os.path.join(args.dir, name + FORMATS[args.format])
+                count = exportReport(conn, name, path, args.format, args.batch_size)
+                print(f"{name}: {count:,} rows written to {path}")
+
+    except (Error, RuntimeError) as e:
+        print("Error:", e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# Blue Group -  CSD-310
+# Runs every Bacchus report at once.
+
+# Each report is registered by name below. The reports run in parallel on a thread pool,
+# each on its own pooled connection, and are printed in registration order when they finish.
+
+import argparse
+import importlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+from bacchusDB import get_connection, getPool
+from deliveryAnalytics import LATENESS_WINDOW_QUERY, fetchSupplierLateness
+from queryTrace import executeQuery, tracedCursor
+from reportCache import DEFAULT_TTL, cachedResult
+from rollups import refreshWineSalesSummary
+from tableFormat import printTable
+
+# The report scripts have hyphens in their names, so they are loaded with importlib.
+hoursReport = importlib.import_module("Breutzmann-Report")
+wineReport = importlib.import_module("Rodriguez-Report")
+deliveryReport = importlib.import_module("White-Report")
+
+
+def runHoursReport(conn):
+    rows = hoursReport.formatData(hoursReport.fetchHoursWorked(conn))
+    return hoursReport.HOURS_HEADERS, rows
+
+
+# Reports that read a summary table: refresh(conn) brings it up to date before the query runs.
+SUMMARY_REFRESH = {
+    "wine-sold": refreshWineSalesSummary,
+    "wine-not-sold": refreshWineSalesSummary,
+}
+
+
+def queryReport(query, label, params=None):
+    # Builds a report function that runs one query and returns (headers, rows).
+    def run(conn):
+        if label in SUMMARY_REFRESH:
+            SUMMARY_REFRESH[label](conn)
+        cursor = tracedCursor(conn)
+        try:
+            executeQuery(cursor, query, label, params)
+            rows = cursor.fetchall()
+            headers = [desc[0] for desc in cursor.description]
+        finally:
+            cursor.close()
+        return headers, rows
+    return run
+
+
+# name: (title, query, query params, tables it reads, function(conn) -> (headers, rows))
+REPORTS = {
+    "hours": (
+        "Average Hours Worked Per Quarter (Last Year)",
+        hoursReport.HOURS_QUERY,
+        hoursReport.HOURS_PARAMS,
+        ["Employee", "Hours", "Department"],
+        runHoursReport
+    ),
+    "wine-distribution": (
+        "Wine Distribution (Top Wines, First Page of Distributors)",
+        wineReport.WINE_BY_DIST_QUERY,
+        wineReport.WINE_BY_DIST_PARAMS,
+        ["Distributor", "DistOrder", "DistItemOrder", "Wine"],
+        queryReport(wineReport.WINE_BY_DIST_QUERY, "wine-distribution", wineReport.WINE_BY_DIST_PARAMS)
+    ),
+    "wine-sold": (
+        "Total Sold per Wine",
+        wineReport.WINE_SOLD_QUERY,
+        None,
+        ["Wine", "WineSalesSummary", "DistItemOrder"], # New line items mean the summary needs a refresh.
+        queryReport(wineReport.WINE_SOLD_QUERY, "wine-sold")
+    ),
+    "wine-not-sold": (
+        "Wines That Haven't Sold",
+        wineReport.WINE_NOT_SOLD_QUERY,
+        None,
+        ["Wine", "WineSalesSummary", "DistItemOrder"],
+        queryReport(wineReport.WINE_NOT_SOLD_QUERY, "wine-not-sold")
+    ),
+    "delivery-detail": (
+        "Supplier Delivery Report - Expected vs Actual",
+        deliveryReport.DELIVERY_QUERY,
+        None,
+        ["SupplierDelivery", "Supplier"],
+        queryReport(deliveryReport.DELIVERY_QUERY, "delivery-detail")
+    ),
+    "delivery-summary": (
+        "Supplier Delivery Summary - Average Days Difference",
+        deliveryReport.DELIVERY_SUMMARY_QUERY,
+        None,
+        ["SupplierDeliveryStats", "Supplier"],
+        queryReport(deliveryReport.DELIVERY_SUMMARY_QUERY, "delivery-summary")
+    ),
+    "delivery-lateness": (
+        "Supplier Lateness - Rolling On-Time Rate, Percentiles and Trend",
+        LATENESS_WINDOW_QUERY,
+        None, # Dated from the latest ActualDelivery when it runs.
+        ["SupplierDelivery", "Supplier"],
+        fetchSupplierLateness
+    ),
+}
+
+
+def runReport(name, cacheTTL=None):
+    # Runs in a worker thread. Returns (headers, rows, seconds) or raises the report's error.
+    # With a cacheTTL, an unchanged result is read from the report cache instead of the database.
+    title, query, params, tables, report = REPORTS[name]
+    started = time.perf_counter()
+    with get_connection() as conn:
+        if cacheTTL:
+            headers, rows = cachedResult(conn, query, tables, report, params, ttl=cacheTTL)
+        else:
+            headers, rows = report(conn)
+    return headers, rows, time.perf_counter() - started
+
+
+def runReports(names, workers, cacheTTL=None):
+    # Starts every report, then collects the results in the order the names were given.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(runReport, name, cacheTTL) for name in names}
+
+        results = {}
+        for name in names:
+            try:
+                results[name] = futures[name].result()
+            except Exception as e: # One failed report (a query, the cache, ...) shouldn't lose the others.
+                results[name] = e
+    return results
+
+
+def printResults(names, results, file):
+    for name in names:
+        title = REPORTS[name][0]
+        print("\n" + "=" * 70, file=file)
+        print(title, file=file)
+        print("-" * 70, file=file)
+
+        result = results[name]
+        if isinstance(result, Exception):
+            print("Error:", result, file=file)
+            continue
+
+        headers, rows, seconds = result
+        printTable(headers, rows, file=file)
+
+
+def printTimings(names, results, wallTime, file):
+    print("\n" + "=" * 70, file=file)
+    print("Report Timings", file=file)
+    print("-" * 70, file=file)
+
+    timings = []
+    for name in names:
+        result = results[name]
+        if isinstance(result, Exception):
+            timings.append((name, "", "failed"))
+        else:
+            headers, rows, seconds = result
+            timings.append((name, len(rows), f"{seconds:.3f}s"))
+    timings.append(("total (wall)", "", f"{wallTime:.3f}s"))
+
+    printTable(["Report", "Rows", "Time"], timings, file=file)
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Run the Bacchus reports in parallel.")
+    parser.add_argument(
+        "reports",
+        nargs="*",
+        help=f"reports to run, any of: {', '.join(REPORTS)} (default: all)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="reports to run at once (default: DB_POOL_SIZE from setup.env)"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse cached results while the tables a report reads are unchanged"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_TTL,
+        help=f"seconds a cached result stays valid even if nothing changed (default: {DEFAULT_TTL})"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="write the report text to this file instead of the screen"
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(unknown)}")
+
+    return args
+
+
+def main():
+    args = parseArgs()
+    names = args.reports or list(REPORTS)
+
+    try:
+        # Each thread holds one pooled connection, so never run more reports at once than the pool has.
+        poolSize = getPool().pool_size
+        workers = min(args.workers or poolSize, poolSize, len(names))
+
+        started = time.perf_counter()
+        results = runReports(names, workers, args.cache_ttl if args.cache else None)
+        wallTime = time.perf_counter() - started
+
+    except Error as e:
+        print("Error:", e)
+        return
+
+    if args.output:
+        with open(args.output, "w") as file:
+            printResults(names, results, file)
+            printTimings(names, results, wallTime, file)
+        print(f"Reports written to {args.output}")
+    else:
+        printResults(names, results, sys.stdout)
+
+    printTimings(names, results, wallTime, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
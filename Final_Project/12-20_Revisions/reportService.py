@@ -0,0 +1,299 @@
+# Blue Group -  CSD-310
+# Local HTTP service that serves the Bacchus reports as JSON for dashboards.
+
+# GET /reports lists the reports; GET /reports/<name> returns one as JSON, or as NDJSON (one row object
+# per line) with ?format=ndjson or "Accept: application/x-ndjson". Every request shares the connection
+# pool, and results are kept in an in-memory LRU (reportCache.ResultCache) until a table the report reads
+# changes or the TTL runs out, so dashboards polling every minute don't each rerun the aggregation.
+# The ETag is built from those table versions and the format: a dashboard that sends If-None-Match gets a 304 without
+# the report running at all. Bodies are written in chunks as rows are encoded, and query reports that
+# aren't cached are streamed from an unbuffered cursor; results over --cache-max-rows are not kept.
+
+import argparse
+import hashlib
+import json
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from mysql.connector import Error
+
+from bacchusDB import get_connection, loadConfig
+from queryTrace import executeQuery, tracedCursor
+from reportCache import DEFAULT_CACHE_SIZE, DEFAULT_TTL, ResultCache, tableVersions
+from reportExport import PIVOTED_REPORTS, fetchBatches
+from reportRunner import REPORTS, SUMMARY_REFRESH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8310
+DEFAULT_MAX_ROWS = 100000 # larger results are streamed but not cached
+DEFAULT_BATCH_SIZE = 5000
+CHUNK_BYTES = 64 * 1024 # body text sent per HTTP chunk
+
+JSON_TYPE = "application/json"
+NDJSON_TYPE = "application/x-ndjson"
+
+
+def jsonDefault(value):
+    # Values json can't encode on its own.
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def toJSON(value):
+    return json.dumps(value, default=jsonDefault)
+
+
+def reportETag(name, versions, contentType):
+    # Changes whenever any table the report reads does. JSON and NDJSON are different bodies, so each gets its own.
+    digest = hashlib.sha256(f"{name}\0{contentType}\0{versions!r}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def jsonBody(name, headers, rows):
+    # {"report": ..., "title": ..., "headers": [...], "rows": [[...], ...]}, one row at a time.
+    meta = toJSON({"report": name, "title": REPORTS[name][0], "headers": headers})
+    yield meta[:-1] + ', "rows": ['
+    for rowIDX, row in enumerate(rows):
+        yield ("," if rowIDX else "") + toJSON(list(row))
+    yield "]}\n"
+
+
+def ndjsonBody(headers, rows):
+    for row in rows:
+        yield toJSON(dict(zip(headers, row))) + "\n"
+
+
+def cachingRows(batches, cache, name, versions, headers, maxRows):
+    # Passes the rows through and caches them once the result is complete, if it stayed small enough.
+    kept = []
+    for batch in batches:
+        if kept is not None:
+            kept.extend(batch)
+            if len(kept) > maxRows:
+                kept = None
+        yield from batch
+    if kept is not None:
+        cache.put(name, versions, headers, kept)
+
+
+def streamQuery(conn, name, batchSize):
+    # Runs a query report on an unbuffered cursor. Returns (headers, batches); the generator
+    # closes the cursor when it is exhausted or closed.
+    title, query, params, tables, report = REPORTS[name]
+    cursor = tracedCursor(conn)
+    executeQuery(cursor, query, f"service {name}", params)
+    headers = [desc[0] for desc in cursor.description]
+
+    def batches():
+        try:
+            yield from fetchBatches(cursor, batchSize)
+        finally:
+            if conn.unread_result:
+                conn.consume_results() # The client went away mid-stream.
+            cursor.close()
+
+    return headers, batches()
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    # The cache and limits live on the server (see makeServer), shared by every request thread.
+
+    protocol_version = "HTTP/1.1" # Needed for chunked bodies and keep-alive polling.
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+
+        if path in ("", "/reports"):
+            reports = [
+                {"name": name, "title": REPORTS[name][0], "url": f"/reports/{name}"}
+                for name in REPORTS
+            ]
+            self.sendJSON(HTTPStatus.OK, {"reports": reports})
+            return
+
+        name = path[len("/reports/"):] if path.startswith("/reports/") else None
+        if name not in REPORTS:
+            self.sendJSON(HTTPStatus.NOT_FOUND, {"error": f"unknown report: {url.path}"})
+            return
+
+        query = parse_qs(url.query)
+        ndjson = query.get("format") == ["ndjson"] or NDJSON_TYPE in self.headers.get("Accept", "")
+
+        self.headersSent = False
+        try:
+            self.serveReport(name, ndjson)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True # The dashboard hung up; the cursor is cleaned up on the way out.
+        except Error as e:
+            if self.headersSent:
+                self.close_connection = True # Too late for an error status; cut the body short.
+            else:
+                self.sendJSON(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    def serveReport(self, name, ndjson):
+        title, query, params, tables, report = REPORTS[name]
+        server = self.server
+        contentType = NDJSON_TYPE if ndjson else JSON_TYPE
+
+        # Waiting for a pool slot here beats the pool raising "exhausted" when dashboards pile up.
+        with server.slots, get_connection() as conn:
+            versions = tableVersions(conn, tables)
+            etag = reportETag(name, versions, contentType)
+            if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                self.send_response(HTTPStatus.NOT_MODIFIED) # Nothing it reads has changed.
+                self.send_header("ETag", etag)
+                self.send_header("Vary", "Accept")
+                self.end_headers()
+                return
+
+            cached = server.cache.get(name, versions)
+
+            batches = None
+            if cached is not None:
+                headers, rows = cached
+                status = "hit"
+            elif name in PIVOTED_REPORTS:
+                headers, rows = report(conn)
+                if len(rows) <= server.maxRows:
+                    server.cache.put(name, versions, headers, rows)
+                status = "miss"
+            else:
+                if name in SUMMARY_REFRESH:
+                    SUMMARY_REFRESH[name](conn)
+                    versions = tableVersions(conn, tables) # The refresh itself writes to the summary table.
+                    etag = reportETag(name, versions, contentType)
+                headers, batches = streamQuery(conn, name, server.batchSize)
+                rows = cachingRows(batches, server.cache, name, versions, headers, server.maxRows)
+                status = "miss"
+
+            try:
+                body = ndjsonBody(headers, rows) if ndjson else jsonBody(name, headers, rows)
+                self.sendChunked(HTTPStatus.OK, contentType, body, {
+                    "ETag": etag,
+                    "Vary": "Accept", # The format can come from the Accept header as well as ?format=.
+                    "Cache-Control": "no-cache", # Keep revalidating with If-None-Match.
+                    "X-Report-Cache": status,
+                })
+            finally:
+                if batches is not None:
+                    batches.close()
+
+    def sendJSON(self, status, payload):
+        body = (toJSON(payload) + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def sendChunked(self, status, contentType, pieces, headers):
+        # Writes an iterable of text pieces with chunked transfer encoding, CHUNK_BYTES at a time.
+        self.send_response(status)
+        self.send_header("Content-Type", f"{contentType}; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.headersSent = True
+
+        buffer = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= CHUNK_BYTES:
+                self.writeChunk("".join(buffer).encode())
+                buffer = []
+                size = 0
+        if buffer:
+            self.writeChunk("".join(buffer).encode())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def writeChunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+
+def makeServer(host, port, cacheSize=DEFAULT_CACHE_SIZE, cacheTTL=DEFAULT_TTL, maxRows=DEFAULT_MAX_ROWS,
+               batchSize=DEFAULT_BATCH_SIZE):
+    config, poolSize = loadConfig()
+    server = ThreadingHTTPServer((host, port), ReportHandler)
+    server.cache = ResultCache(cacheSize, cacheTTL)
+    server.slots = threading.BoundedSemaphore(poolSize) # One request per pooled connection.
+    server.maxRows = maxRows
+    server.batchSize = batchSize
+    return server
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Serve the Bacchus reports as JSON over HTTP.")
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"address to listen on (default: {DEFAULT_HOST}, this machine only)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"port to listen on (default: {DEFAULT_PORT})"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"report results kept in memory (default: {DEFAULT_CACHE_SIZE})"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_TTL,
+        help=f"seconds a cached result stays valid even if nothing changed (default: {DEFAULT_TTL})"
+    )
+    parser.add_argument(
+        "--cache-max-rows",
+        type=int,
+        default=DEFAULT_MAX_ROWS,
+        help=f"results with more rows than this are streamed but not cached (default: {DEFAULT_MAX_ROWS:,})"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"rows fetched per batch when streaming a query report (default: {DEFAULT_BATCH_SIZE:,})"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    try:
+        server = makeServer(args.host, args.port, args.cache_size, args.cache_ttl, args.cache_max_rows,
+                            args.batch_size)
+    except (OSError, ValueError) as e:
+        print("Error:", e)
+        return
+
+    print(f"Serving the Bacchus reports on http://{args.host}:{args.port}/reports (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
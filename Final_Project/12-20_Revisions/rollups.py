@@ -0,0 +1,259 @@
+# Blue Group -  CSD-310
+# Summary tables that the reports read instead of re-aggregating the raw rows.
+
+# HoursDaily holds one row per employee per work date (total hours and shift count). Only the
+# dates that changed are rebuilt, so keeping it current costs O(new days), and the hours report
+# scans a fraction of the rows it would read from Hours.
+
+# WineSalesSummary holds one row per wine (total sold and last order date). SummaryWatermark
+# remembers the highest DistItemOrder.OrderItemID already counted, so a refresh only adds the
+# line items after it. That assumes line items are only ever added, never edited or deleted;
+# after changing old orders, rebuild the summary instead.
+
+# SupplierDeliveryStats and SupplierDeliveryMonthStats are kept current by triggers on
+# SupplierDelivery (see Bacchus_Database_Creation.sql). TRUNCATE and copies of the schema skip
+# those triggers, so rebuildSupplierDeliveryStats recounts them from scratch.
+
+import argparse
+from datetime import date, timedelta
+
+from mysql.connector import Error
+
+from bacchusDB import get_connection
+
+
+def refreshHoursDaily(conn, startDate, endDate):
+    # Rebuilds HoursDaily for startDate..endDate (inclusive) from Hours. Returns the rows written.
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "DELETE FROM HoursDaily WHERE WorkDate >= %s AND WorkDate <= %s;",
+            (startDate, endDate)
+        )
+        cur.execute(
+            """
+            INSERT INTO HoursDaily (EmployeeID, WorkDate, TotalHours, ShiftCount)
+            SELECT
+                EmployeeID,
+                DATE(StartShift),
+                SUM(HoursWorked),
+                COUNT(*)
+            FROM Hours
+            WHERE StartShift >= %s
+              AND StartShift < %s
+            GROUP BY EmployeeID, DATE(StartShift);
+            """,
+            (startDate, endDate + timedelta(days=1))
+        )
+        written = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+    return written
+
+
+def refreshWineSalesSummary(conn):
+    # Adds DistItemOrder rows past the high-water mark to WineSalesSummary. Returns the line items counted.
+    cur = conn.cursor()
+    try:
+        # Locks the watermark row, so two refreshes can't count the same line items.
+        cur.execute("SELECT LastID FROM SummaryWatermark WHERE Name = 'WineSalesSummary' FOR UPDATE;")
+        row = cur.fetchone()
+        lastID = row[0] if row else 0
+
+        cur.execute("SELECT COALESCE(MAX(OrderItemID), 0) FROM DistItemOrder;")
+        highID = cur.fetchone()[0]
+
+        # Every wine gets a row, so wines that never sold are in the summary too. Only the missing wines are
+        # inserted: INSERT IGNORE would warn on every existing row, and the connection raises on warnings.
+        cur.execute(
+            """
+            INSERT INTO WineSalesSummary (WineID, TotalSold)
+            SELECT w.WineID, 0
+            FROM Wine AS w
+            LEFT JOIN WineSalesSummary AS s
+                ON s.WineID = w.WineID
+            WHERE s.WineID IS NULL;
+            """
+        )
+
+        counted = 0
+        if highID > lastID:
+            cur.execute(
+                """
+                SELECT COUNT(*)
+                FROM DistItemOrder
+                WHERE OrderItemID > %s
+                  AND OrderItemID <= %s;
+                """,
+                (lastID, highID)
+            )
+            counted = cur.fetchone()[0]
+
+            # The aggregate is a derived table so the update can name its columns; VALUES() in
+            # ON DUPLICATE KEY UPDATE is deprecated (a warning) as of MySQL 8.0.20.
+            cur.execute(
+                """
+                INSERT INTO WineSalesSummary (WineID, TotalSold, LastOrderDate)
+                SELECT * FROM (
+                    SELECT
+                        dio.WineID,
+                        COALESCE(SUM(dio.Quantity), 0) AS Sold,
+                        MAX(o.OrderDate) AS LastDate
+                    FROM DistItemOrder AS dio
+                    INNER JOIN DistOrder AS o
+                        ON o.OrderID = dio.OrderID
+                    WHERE dio.OrderItemID > %s
+                      AND dio.OrderItemID <= %s
+                    GROUP BY dio.WineID
+                ) AS new
+                ON DUPLICATE KEY UPDATE
+                    TotalSold = TotalSold + new.Sold,
+                    LastOrderDate = GREATEST(COALESCE(LastOrderDate, new.LastDate), new.LastDate);
+                """,
+                (lastID, highID)
+            )
+
+            if row:
+                cur.execute(
+                    "UPDATE SummaryWatermark SET LastID = %s WHERE Name = 'WineSalesSummary';",
+                    (highID,)
+                )
+            else:
+                cur.execute(
+                    "INSERT INTO SummaryWatermark (Name, LastID) VALUES ('WineSalesSummary', %s);",
+                    (highID,)
+                )
+
+        conn.commit()
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return counted
+
+
+def rebuildWineSalesSummary(conn):
+    # Empties WineSalesSummary and counts every line item again. Returns the line items counted.
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM WineSalesSummary;")
+        cur.execute("DELETE FROM SummaryWatermark WHERE Name = 'WineSalesSummary';")
+    finally:
+        cur.close()
+    return refreshWineSalesSummary(conn) # Commits the deletes together with the new totals.
+
+
+# Counts shared by both stats tables, computed from SupplierDelivery rows.
+DELIVERY_STATS_COLUMNS = """
+    COUNT(*),
+    SUM(ActualDelivery IS NULL),
+    SUM(ActualDelivery IS NOT NULL AND ExpectedDelivery IS NOT NULL),
+    COALESCE(SUM(DATEDIFF(ActualDelivery, ExpectedDelivery)), 0),
+    COALESCE(SUM(DATEDIFF(ActualDelivery, ExpectedDelivery) < 0), 0),
+    COALESCE(SUM(DATEDIFF(ActualDelivery, ExpectedDelivery) = 0), 0),
+    COALESCE(SUM(DATEDIFF(ActualDelivery, ExpectedDelivery) > 0), 0)
+"""
+DELIVERY_STATS_NAMES = (
+    "TotalDeliveries, PendingDeliveries, MeasuredDeliveries, SumDaysDifference, "
+    "EarlyCount, OnTimeCount, LateCount"
+)
+
+
+def rebuildSupplierDeliveryStats(conn):
+    # Recounts both supplier delivery stats tables from SupplierDelivery. Returns the supplier rows written.
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM SupplierDeliveryMonthStats;")
+        cur.execute("DELETE FROM SupplierDeliveryStats;")
+        cur.execute(
+            f"""
+            INSERT INTO SupplierDeliveryStats (SupplierID, {DELIVERY_STATS_NAMES})
+            SELECT SupplierID, {DELIVERY_STATS_COLUMNS}
+            FROM SupplierDelivery
+            GROUP BY SupplierID;
+            """
+        )
+        written = cur.rowcount
+        cur.execute(
+            f"""
+            INSERT INTO SupplierDeliveryMonthStats (SupplierID, MonthStart, {DELIVERY_STATS_NAMES})
+            SELECT SupplierID, DATE_FORMAT(ExpectedDelivery, '%Y-%m-01'), {DELIVERY_STATS_COLUMNS}
+            FROM SupplierDelivery
+            WHERE ExpectedDelivery IS NOT NULL
+            GROUP BY SupplierID, DATE_FORMAT(ExpectedDelivery, '%Y-%m-01');
+            """
+        )
+        conn.commit()
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return written
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Rebuild the Bacchus summary tables.")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=None,
+        help="rebuild HoursDaily from this date, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="last HoursDaily date to rebuild, YYYY-MM-DD (default: today)"
+    )
+    parser.add_argument(
+        "--wine-sales",
+        action="store_true",
+        help="add new DistItemOrder rows to WineSalesSummary"
+    )
+    parser.add_argument(
+        "--rebuild-wine-sales",
+        action="store_true",
+        help="rebuild WineSalesSummary from every DistItemOrder row"
+    )
+    parser.add_argument(
+        "--rebuild-delivery-stats",
+        action="store_true",
+        help="rebuild SupplierDeliveryStats and SupplierDeliveryMonthStats from SupplierDelivery"
+    )
+    args = parser.parse_args()
+
+    if args.start is None and not (args.wine_sales or args.rebuild_wine_sales or args.rebuild_delivery_stats):
+        parser.error("nothing to refresh; give --start, --wine-sales, --rebuild-wine-sales or --rebuild-delivery-stats")
+
+    return args
+
+
+def main():
+    args = parseArgs()
+
+    try:
+        with get_connection() as conn:
+            if args.start is not None:
+                written = refreshHoursDaily(conn, args.start, args.end)
+                print(f"HoursDaily refreshed for {args.start} to {args.end}: {written:,} rows.")
+
+            if args.rebuild_wine_sales:
+                counted = rebuildWineSalesSummary(conn)
+                print(f"WineSalesSummary rebuilt from {counted:,} line items.")
+            elif args.wine_sales:
+                counted = refreshWineSalesSummary(conn)
+                print(f"WineSalesSummary refreshed: {counted:,} new line items.")
+
+            if args.rebuild_delivery_stats:
+                written = rebuildSupplierDeliveryStats(conn)
+                print(f"Supplier delivery stats rebuilt for {written:,} suppliers.")
+
+    except Error as e:
+        print("Error:", e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Blue Group -  CSD-310
+# Shared text table formatting for the Bacchus reports.
+
+import sys
+from itertools import islice
+
+MAX_HINT_WIDTH = 40 # Don't let a VARCHAR(255) display size stretch a column.
+
+
+def printTable(headers, data, file=None):
+    # Prints rows that were already fetched (by another thread, or from the report cache)
+    # in aligned columns under the given headers.
+    file = file or sys.stdout
+
+    strData = [[("" if col is None else str(col)) for col in row] for row in data]
+
+    colWidth = []
+    for colIDX in range(len(headers)):
+        longest = len(headers[colIDX])
+        for row in strData:
+            longest = max(longest, len(row[colIDX]))
+        colWidth.append(longest)
+
+    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
+
+    print(formatString.format(*headers), file=file)
+
+    separatorLength = sum(colWidth) + (3 * (len(headers) - 1))
+    print("-" * separatorLength, file=file)
+
+    if not data:
+        print("(No Data to Display)", file=file)
+        return
+
+    for row in strData:
+        print(formatString.format(*row), file=file)
+
+
+def printRowStream(headers, rows, sampleSize=1000, widthHints=None, file=None):
+    # Prints any iterable of rows in aligned columns without holding it all in memory.
+    # Column widths come from the headers, optional width hints (e.g. display sizes from
+    # cursor.description) and the first sampleSize rows; a later row that is wider than the
+    # sample simply pushes its line out. Returns the number of rows printed.
+    file = file or sys.stdout
+    rows = iter(rows)
+
+    colWidth = [len(header) for header in headers]
+    for colIDX, hint in enumerate(widthHints or []):
+        if hint:
+            colWidth[colIDX] = max(colWidth[colIDX], min(hint, MAX_HINT_WIDTH))
+
+    sample = [[("" if col is None else str(col)) for col in row] for row in islice(rows, sampleSize)]
+    for row in sample:
+        for colIDX, value in enumerate(row):
+            colWidth[colIDX] = max(colWidth[colIDX], len(value))
+
+    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
+
+    print(formatString.format(*headers), file=file)
+
+    separatorLength = sum(colWidth) + (3 * (len(headers) - 1))
+    print("-" * separatorLength, file=file)
+
+    if not sample:
+        print("(No Data to Display)", file=file)
+        return 0
+
+    for row in sample:
+        print(formatString.format(*row), file=file)
+
+    count = len(sample)
+    for row in rows:
+        print(formatString.format(*[("" if col is None else str(col)) for col in row]), file=file)
+        count += 1
+
+    return count
+
+
+def printStreamingData(cursor, batchSize=1000, sampleSize=1000, file=None):
+    # Prints an executed query's rows as they arrive, using fetchmany on an unbuffered cursor,
+    # so a result never has to fit in memory. Returns the row count.
+    headers = [desc[0] for desc in cursor.description]
+    widthHints = [desc[2] for desc in cursor.description] # display_size, when the driver provides one
+
+    def fetchRows():
+        while True:
+            batch = cursor.fetchmany(batchSize)
+            if not batch:
+                return
+            yield from batch
+
+    return printRowStream(headers, fetchRows(), sampleSize, widthHints, file)
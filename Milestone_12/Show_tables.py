@@ -4,49 +4,15 @@
 # Sara White
 
 
-import mysql.connector
+import argparse
+import os
+import sys
 from mysql.connector import Error
-import dotenv
-from dotenv import dotenv_values
-
-#using our .env file
-secrets = dotenv_values("setup.env")
-
-config = {
-    "user": secrets["DB_USER"],
-    "password": secrets["DB_PASSWORD"],
-    "host": secrets["DB_HOST"],
-    "database": secrets["DB_NAME"],
-    "raise_on_warnings": True #not in .env file
-}
-
-# Function to print data in aligned columns
-
-def printAlignedData(cursor, data):
-    headers = [desc[0] for desc in cursor.description]
-
-    strData = [[("" if col is None else str(col)) for col in row] for row in data]
-
-    colWidth = []
-    for colIDX in range(len(headers)):
-        longest = len(headers[colIDX])
-        for row in strData:
-            longest = max(longest, len(row[colIDX]))
-        colWidth.append(longest)
-
-    formatString = " | ".join("{:<" + str(width) + "}" for width in colWidth)
-
-    print(formatString.format(*headers))
-
-    separatorLength = sum(colWidth) + (3 * (len(headers) - 1))
-    print("-" * separatorLength)
-
-    if not data:
-        print("(No Data to Display)")
-
-    for row in strData:
-        print(formatString.format(*row))
 
+# The shared connection pool lives with the final project scripts.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final_Project", "12-20_Revisions"))
+from bacchusDB import get_connection
+from tableFormat import printRowStream, printStreamingData
 
 def printTableSchema(cursor, table):
     print(f"\n{"="*70}")
@@ -54,38 +20,127 @@ def printTableSchema(cursor, table):
     print("-"*70)
 
     cursor.execute(f"SHOW FULL COLUMNS FROM {table};")
-    columns = cursor.fetchall()
-    printAlignedData(cursor, columns)
+    printStreamingData(cursor)
+
+def fetchPrimaryKey(cursor, table):
+    # Returns the table's primary key columns in index order (empty if it has none).
+    cursor.execute(f"SHOW KEYS FROM `{table}` WHERE Key_name = 'PRIMARY';")
+    keys = cursor.fetchall()
+    seqIDX = [desc[0] for desc in cursor.description].index("Seq_in_index")
+    colIDX = [desc[0] for desc in cursor.description].index("Column_name")
+    return [key[colIDX] for key in sorted(keys, key=lambda key: key[seqIDX])]
+
+
+def fetchKeysetPages(cursor, table, keyColumns, pageSize, limit=None):
+    # Yields the table one page at a time with WHERE pk > last ORDER BY pk LIMIT n,
+    # so each page is a short index range scan no matter how far into the table it is.
+    columns = ", ".join(f"`{column}`" for column in keyColumns)
+    placeholders = ", ".join(["%s"] * len(keyColumns))
+
+    lastKey = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = pageSize if remaining is None else min(pageSize, remaining)
+
+        if lastKey is None:
+            cursor.execute(f"SELECT * FROM `{table}` ORDER BY {columns} LIMIT %s;", (size,))
+        else:
+            cursor.execute(
+                f"SELECT * FROM `{table}` WHERE ({columns}) > ({placeholders}) ORDER BY {columns} LIMIT %s;",
+                (*lastKey, size)
+            )
+        page = cursor.fetchall()
+        yield page
+
+        if len(page) < size:
+            return
+
+        names = [desc[0] for desc in cursor.description]
+        lastKey = tuple(page[-1][names.index(column)] for column in keyColumns)
+        if remaining is not None:
+            remaining -= len(page)
 
-def printTableRows(cursor, table):
+
+def printTableRows(cursor, table, pageSize=1000, limit=None):
     print(f"\n{"="*70}")
     print(f"Data in table: {table}")
     print("-"*70)
 
-    cursor.execute(f"SELECT * FROM {table};")
-    rows = cursor.fetchall()
-    printAlignedData(cursor, rows)
+    keyColumns = fetchPrimaryKey(cursor, table)
+
+    if not keyColumns:
+        # No key to page on, so fall back to one streamed (but still limited) scan.
+        if limit is None:
+            cursor.execute(f"SELECT * FROM `{table}`;")
+        else:
+            cursor.execute(f"SELECT * FROM `{table}` LIMIT %s;", (limit,))
+        printStreamingData(cursor)
+        return
+
+    pages = fetchKeysetPages(cursor, table, keyColumns, pageSize, limit)
+    firstPage = next(pages)
+    headers = [desc[0] for desc in cursor.description]
+
+    def allRows():
+        yield from firstPage
+        for page in pages:
+            yield from page
+
+    printRowStream(headers, allRows(), sampleSize=pageSize)
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Show the data in each table of the Bacchus database.")
+    parser.add_argument(
+        "--table",
+        action="append",
+        default=None,
+        help="only show this table (can be given more than once)"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="show at most this many rows per table (default: all)"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=1000,
+        help="rows fetched per query while paging through a table (default: 1000)"
+    )
+    args = parser.parse_args()
+
+    # Paging needs at least one row per query; with zero there would be no first page to print.
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+
+    return args
 
 def main():
+    args = parseArgs()
+
     try:
-        conn = mysql.connector.connect(**config)
-        if not conn.is_connected():
-            print("Could not connect to database.")
-            return
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SHOW TABLES;")
+            tables = [t[0] for t in cursor.fetchall()]
+            print(f"Found Tables: {tables}\n")
 
-        cursor.execute("SHOW TABLES;")
-        tables = [t[0] for t in cursor.fetchall()]
-        print(f"Found Tables: {tables}\n")
+            if args.table:
+                wanted = {table.lower() for table in args.table}
+                tables = [table for table in tables if table.lower() in wanted]
 
-        # for table in tables:
-        #     printTableSchema(cursor, table)
+            # for table in tables:
+            #     printTableSchema(cursor, table)
 
-        for table in tables:
-            printTableRows(cursor, table)
+            for table in tables:
+                printTableRows(cursor, table, args.page_size, args.limit)
 
-        cursor.close()
-        conn.close()
+            cursor.close()
 
     except Error as e:
         print("Error: ", e)